@@ -0,0 +1,57 @@
+"""
+Benchmark of the approximate kernel density estimators for re-weighting.
+
+:class:`skada.ReweightDensityAdapter` fits a density estimator on the
+source and on the target samples and evaluates both on the source samples.
+This script compares the time to compute the weights with the exact
+:class:`~sklearn.neighbors.KernelDensity` and with
+:class:`skada.ApproximateKernelDensity` (the 'binned' method for 2 features
+and the 'landmarks' method for 20 features), and the correlation between
+the log-weights of the two.
+"""
+# License: BSD 3-Clause
+
+import warnings
+from time import perf_counter
+
+import numpy as np
+from sklearn.neighbors import KernelDensity
+
+from skada import ApproximateKernelDensity, ReweightDensityAdapter
+
+
+def source_weights(weight_estimator, X, sample_domain):
+    adapter = ReweightDensityAdapter(weight_estimator=weight_estimator)
+    start = perf_counter()
+    output = adapter.fit_transform(X, sample_domain=sample_domain)
+    elapsed = perf_counter() - start
+    return output['sample_weight'][sample_domain >= 0], elapsed
+
+
+if __name__ == '__main__':
+    warnings.simplefilter('ignore', UserWarning)
+    print(
+        f"{'n features':>10} {'n samples':>9} {'exact (s)':>10} "
+        f"{'approx (s)':>11} {'log-weights corr':>17}"
+    )
+    rng = np.random.RandomState(0)
+    for n_features, bandwidth in [(2, 0.3), (20, 2.)]:
+        for n_samples in [2000, 10000]:
+            X = np.concatenate([
+                rng.randn(n_samples, n_features),
+                rng.randn(n_samples, n_features) * 1.2 + 0.5,
+            ])
+            sample_domain = np.repeat([1, -2], n_samples)
+            exact, exact_time = source_weights(
+                KernelDensity(bandwidth=bandwidth), X, sample_domain
+            )
+            approx, approx_time = source_weights(
+                ApproximateKernelDensity(bandwidth=bandwidth, random_state=0),
+                X,
+                sample_domain,
+            )
+            corr = np.corrcoef(np.log(exact), np.log(approx))[0, 1]
+            print(
+                f"{n_features:>10} {n_samples:>9} {exact_time:>10.3f} "
+                f"{approx_time:>11.3f} {corr:>17.4f}"
+            )
@@ -0,0 +1,66 @@
+"""
+Benchmark of the blocked Sinkhorn solver of the entropic OT mapping adapter.
+
+With `block_size` set, :class:`skada.EntropicOTMappingAdapter` computes the
+Sinkhorn iterations by blocks of rows of the cost matrix, from the features,
+instead of storing the dense (n_source_samples, n_target_samples) cost
+matrix and coupling. This script compares the fit time, the peak memory and
+the distance to the mapping of the dense solver for growing numbers of
+samples.
+"""
+# License: BSD 3-Clause
+
+import tracemalloc
+import warnings
+from time import perf_counter
+
+import numpy as np
+
+from skada import EntropicOTMappingAdapter
+
+
+def fit_adapter(adapter, X, y, sample_domain):
+    tracemalloc.start()
+    start = perf_counter()
+    X_adapt = adapter.fit_transform(X, y, sample_domain=sample_domain)
+    elapsed = perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return X_adapt, elapsed, peak
+
+
+if __name__ == '__main__':
+    warnings.simplefilter('ignore', UserWarning)
+    print(
+        f"{'n samples':>9} {'solver':>14} {'fit (s)':>8} "
+        f"{'peak (MiB)':>11} {'max diff':>9}"
+    )
+    rng = np.random.RandomState(0)
+    for n_samples in [1000, 2000, 4000]:
+        X = np.concatenate([
+            rng.randn(n_samples, 5), rng.randn(n_samples, 5) + 1
+        ])
+        y = np.concatenate([
+            rng.randint(2, size=n_samples), -np.ones(n_samples, dtype=int)
+        ])
+        sample_domain = np.repeat([1, -2], n_samples)
+        params = dict(reg_e=0.05, norm='max')
+        X_dense, dense_time, dense_peak = fit_adapter(
+            EntropicOTMappingAdapter(method='sinkhorn_log', **params),
+            X, y, sample_domain,
+        )
+        print(
+            f"{n_samples:>9} {'dense':>14} {dense_time:>8.3f} "
+            f"{dense_peak / 2**20:>11.1f} {0:>9.1e}"
+        )
+        for block_size in [256, 1024]:
+            X_blocked, blocked_time, blocked_peak = fit_adapter(
+                EntropicOTMappingAdapter(block_size=block_size, **params),
+                X, y, sample_domain,
+            )
+            name = f'blocks of {block_size}'
+            diff = np.abs(X_blocked - X_dense).max()
+            print(
+                f"{n_samples:>9} {name:>14} {blocked_time:>8.3f} "
+                f"{blocked_peak / 2**20:>11.1f} {diff:>9.1e}"
+            )
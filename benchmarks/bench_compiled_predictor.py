@@ -0,0 +1,70 @@
+"""
+Benchmark of the predict latency of compiled DA pipelines.
+
+:func:`skada.compile_da_pipeline` turns a fitted pipeline into a predictor
+that calls fitted estimators directly, bypassing the Pipeline dispatch and
+the metadata routing. This script reports p50/p99 latencies of predict on
+target-only micro-batches for the pipeline and for the compiled predictor.
+"""
+# License: BSD 3-Clause
+
+import warnings
+from time import perf_counter
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from skada import (
+    CORALAdapter,
+    SubspaceAlignmentAdapter,
+    compile_da_pipeline,
+    make_da_pipeline,
+)
+from skada.datasets import make_shifted_datasets
+
+
+def latency_percentiles(predict, batches, n_repeat=20):
+    timings = []
+    for _ in range(n_repeat):
+        for X_batch in batches:
+            start = perf_counter()
+            predict(X_batch)
+            timings.append(perf_counter() - start)
+    return np.percentile(timings, [50, 99]) * 1e6
+
+
+if __name__ == '__main__':
+    # merging target-only batches warns about the inferred source part
+    warnings.simplefilter('ignore', UserWarning)
+    X, y, sample_domain = make_shifted_datasets(
+        n_samples_source=100,
+        n_samples_target=100,
+        noise=0.1,
+        random_state=42,
+    )
+    pipe = make_da_pipeline(
+        StandardScaler(),
+        CORALAdapter(),
+        SubspaceAlignmentAdapter(n_components=2),
+        LogisticRegression(),
+    )
+    pipe.fit(X, y, sample_domain=sample_domain)
+    predictor = compile_da_pipeline(pipe)
+    X_target = X[sample_domain < 0]
+
+    print(
+        f"{'batch size':>10} {'pipeline p50':>13} {'pipeline p99':>13} "
+        f"{'compiled p50':>13} {'compiled p99':>13}   (us)"
+    )
+    for batch_size in [1, 10, 50]:
+        batches = [
+            X_target[i:i + batch_size]
+            for i in range(0, 200, batch_size)
+        ][:200]
+        pipe_p50, pipe_p99 = latency_percentiles(pipe.predict, batches)
+        comp_p50, comp_p99 = latency_percentiles(predictor.predict, batches)
+        print(
+            f"{batch_size:>10} {pipe_p50:>13.1f} {pipe_p99:>13.1f} "
+            f"{comp_p50:>13.1f} {comp_p99:>13.1f}"
+        )
@@ -0,0 +1,67 @@
+"""
+Benchmark of the domain index shared within a pipeline call.
+
+Input validation, source/target split and merge, and the selectors all
+need the domains of the samples. Within a pipeline call, the
+:class:`~skada.utils.DomainIndex` of a `sample_domain` array is built once
+and shared by the steps. This script compares the time of fit and predict
+through a ``make_da_pipeline`` pipeline with the shared index and with an
+index built again on every lookup.
+"""
+# License: BSD 3-Clause
+
+import warnings
+from contextlib import contextmanager
+from time import perf_counter
+from unittest import mock
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from skada import CORALAdapter, make_da_pipeline
+from skada.utils import DomainIndex
+
+
+def median_time(func, n_repeat=7):
+    timings = []
+    for _ in range(n_repeat):
+        start = perf_counter()
+        func()
+        timings.append(perf_counter() - start)
+    return np.median(timings) * 1e3
+
+
+@contextmanager
+def unshared_index():
+    """Build the index on every lookup."""
+    with mock.patch('skada.utils.get_domain_index', DomainIndex), \
+            mock.patch('skada.base.get_domain_index', DomainIndex):
+        yield
+
+
+if __name__ == '__main__':
+    warnings.simplefilter('ignore', UserWarning)
+    rng = np.random.RandomState(0)
+    print(
+        f"{'n samples':>9} {'method':>8} {'unshared (ms)':>14} {'shared (ms)':>12}"
+    )
+    for n_samples in [10000, 200000]:
+        X = rng.randn(n_samples, 10)
+        sample_domain = rng.choice([1, 2, 3, -4], size=n_samples)
+        y = rng.randint(2, size=n_samples)
+        y[sample_domain < 0] = -1
+        X_target = X[sample_domain < 0]
+        target_domain = sample_domain[sample_domain < 0]
+        pipe = make_da_pipeline(CORALAdapter(), LogisticRegression(max_iter=20))
+        calls = {
+            'fit': lambda: pipe.fit(X, y, sample_domain=sample_domain),
+            'predict': lambda: pipe.predict(X_target, sample_domain=target_domain),
+        }
+        calls['fit']()
+        for method, call in calls.items():
+            with unshared_index():
+                t_unshared = median_time(call)
+            t_shared = median_time(call)
+            print(
+                f"{n_samples:>9} {method:>8} {t_unshared:>14.1f} {t_shared:>12.1f}"
+            )
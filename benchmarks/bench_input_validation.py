@@ -0,0 +1,58 @@
+"""
+Benchmark of the per-call overhead of input validation in DA pipelines.
+
+Arrays validated by ``check_X_domain``/``check_X_y_domain`` during a call of
+a DA pipeline are marked, so that the following steps of the same call (e.g.
+``BaseAdapter.transform`` and ``adapt``) skip re-validation. This script
+compares predict latency on small batches with and without the marker.
+"""
+# License: BSD 3-Clause
+
+import warnings
+from time import perf_counter
+from unittest import mock
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from skada import CORALAdapter, SubspaceAlignmentAdapter, make_da_pipeline
+from skada.datasets import make_shifted_datasets
+
+
+def predict_latency(pipe, batches, n_repeat=5):
+    timings = []
+    for _ in range(n_repeat):
+        for X_batch in batches:
+            start = perf_counter()
+            pipe.predict(X_batch)
+            timings.append(perf_counter() - start)
+    return np.median(timings) * 1e6
+
+
+if __name__ == '__main__':
+    # merging target-only batches warns about the inferred source part
+    warnings.simplefilter('ignore', UserWarning)
+    X, y, sample_domain = make_shifted_datasets(
+        n_samples_source=100,
+        n_samples_target=100,
+        noise=0.1,
+        random_state=42,
+    )
+    pipe = make_da_pipeline(
+        CORALAdapter(),
+        SubspaceAlignmentAdapter(n_components=2),
+        LogisticRegression(),
+    )
+    pipe.fit(X, y, sample_domain=sample_domain)
+    X_target = X[sample_domain < 0]
+
+    print(f"{'batch size':>10} {'revalidate (us)':>16} {'marker (us)':>12}")
+    for batch_size in [1, 10, 50]:
+        batches = [
+            X_target[i:i + batch_size]
+            for i in range(0, 200, batch_size)
+        ][:200]
+        with mock.patch('skada.utils._is_validated', return_value=False):
+            t_revalidate = predict_latency(pipe, batches)
+        t_marker = predict_latency(pipe, batches)
+        print(f"{batch_size:>10} {t_revalidate:>16.1f} {t_marker:>12.1f}")
@@ -0,0 +1,90 @@
+"""
+Benchmark of the minibatch mode of the OT mapping adapters.
+
+With `batch_size` set, :class:`skada.OTMappingAdapter` solves OT problems
+between random batches of source and target samples instead of a single
+problem with a dense (n_source_samples, n_target_samples) coupling. This
+script compares the fit time, the peak memory, the distance to the mapping
+of the full OT problem and the accuracy on the target domain for a few
+values of `batch_size` and `n_batches`.
+"""
+# License: BSD 3-Clause
+
+import tracemalloc
+import warnings
+from time import perf_counter
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from skada import OTMappingAdapter, make_da_pipeline
+from skada.datasets import make_shifted_datasets
+
+
+def fit_adapter(adapter, X, y, sample_domain):
+    tracemalloc.start()
+    start = perf_counter()
+    X_adapt = adapter.fit_transform(X, y, sample_domain=sample_domain)
+    elapsed = perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return X_adapt, elapsed, peak
+
+
+def target_accuracy(adapter, X, y, sample_domain, y_target):
+    pipe = make_da_pipeline(adapter, LogisticRegression())
+    pipe.fit(X, y, sample_domain=sample_domain)
+    target = sample_domain < 0
+    y_pred = pipe.predict(X[target], sample_domain=sample_domain[target])
+    return np.mean(y_pred == y_target)
+
+
+if __name__ == '__main__':
+    warnings.simplefilter('ignore', UserWarning)
+    X, y, sample_domain = make_shifted_datasets(
+        n_samples_source=150,
+        n_samples_target=150,
+        shift='covariate_shift',
+        noise=0.2,
+        random_state=42,
+    )
+    target = sample_domain < 0
+    y_target = y[target].copy()
+    y[target] = -1
+    source = ~target
+
+    X_full, full_time, full_peak = fit_adapter(
+        OTMappingAdapter(), X, y, sample_domain
+    )
+    full_accuracy = target_accuracy(
+        OTMappingAdapter(), X, y, sample_domain, y_target
+    )
+
+    print(
+        f"{'batch size':>10} {'n batches':>10} {'fit (s)':>8} "
+        f"{'peak (MiB)':>11} {'RMSE to full':>13} {'target acc':>11}"
+    )
+    print(
+        f"{'full':>10} {'':>10} {full_time:>8.3f} "
+        f"{full_peak / 2**20:>11.1f} {0:>13.3f} {full_accuracy:>11.3f}"
+    )
+    n_source = np.sum(source)
+    for batch_size in [64, 256, 1024]:
+        one_pass = -(-n_source // batch_size)
+        for n_batches in [one_pass, 4 * one_pass, 16 * one_pass]:
+            params = dict(
+                batch_size=batch_size, n_batches=n_batches, random_state=0
+            )
+            X_batch, batch_time, batch_peak = fit_adapter(
+                OTMappingAdapter(**params), X, y, sample_domain
+            )
+            rmse = np.sqrt(np.mean(
+                np.sum((X_batch[source] - X_full[source]) ** 2, axis=1)
+            ))
+            accuracy = target_accuracy(
+                OTMappingAdapter(**params), X, y, sample_domain, y_target
+            )
+            print(
+                f"{batch_size:>10} {n_batches:>10} {batch_time:>8.3f} "
+                f"{batch_peak / 2**20:>11.1f} {rmse:>13.3f} {accuracy:>11.3f}"
+            )
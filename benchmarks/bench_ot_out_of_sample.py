@@ -0,0 +1,65 @@
+"""
+Benchmark of the out-of-sample mapping of the OT mapping adapters.
+
+Source samples unseen during fit are moved as their nearest fitted source
+sample. The OT mapping adapters query a nearest neighbors index built at
+fit time, instead of computing the distances to all the fitted source
+samples (and the barycentric mapping) for every batch as POT transport
+objects do. This script compares the latency of both for small batches.
+"""
+# License: BSD 3-Clause
+
+import warnings
+from time import perf_counter
+
+import numpy as np
+
+from skada import OTMappingAdapter
+from skada.datasets import make_shifted_datasets
+
+
+def latency(transform, batches, n_repeat=5):
+    timings = []
+    for _ in range(n_repeat):
+        for X_batch in batches:
+            start = perf_counter()
+            transform(X_batch)
+            timings.append(perf_counter() - start)
+    return np.median(timings) * 1e6
+
+
+if __name__ == '__main__':
+    warnings.simplefilter('ignore', UserWarning)
+    print(
+        f"{'n_fitted':>9} {'batch size':>10} {'POT (us)':>10} "
+        f"{'index (us)':>11}"
+    )
+    for n_samples in [50, 200]:
+        X, y, sample_domain = make_shifted_datasets(
+            n_samples_source=n_samples,
+            n_samples_target=n_samples,
+            noise=0.1,
+            random_state=42,
+        )
+        adapter = OTMappingAdapter().fit(X, y, sample_domain=sample_domain)
+        source = sample_domain >= 0
+        rng = np.random.RandomState(0)
+        X_new = X[source] + 0.01 * rng.randn(*X[source].shape)
+        for batch_size in [1, 10, 100]:
+            batches = [
+                X_new[i:i + batch_size] for i in range(0, 400, batch_size)
+            ]
+            t_pot = latency(
+                lambda X_batch: adapter.ot_transport_.transform(Xs=X_batch),
+                batches,
+            )
+            t_index = latency(
+                lambda X_batch: adapter.adapt(
+                    X_batch, sample_domain=np.ones(X_batch.shape[0])
+                ),
+                batches,
+            )
+            print(
+                f"{np.sum(source):>9} {batch_size:>10} {t_pot:>10.1f} "
+                f"{t_index:>11.1f}"
+            )
@@ -0,0 +1,64 @@
+"""
+Benchmark of the per source domain mode of the OT mapping adapters.
+
+With `per_source_domain=True`, :class:`skada.OTMappingAdapter` solves one OT
+problem between each source domain and the target domain, in parallel with
+`n_jobs`, instead of a single problem between all the source samples and
+the target samples. This script compares the fit time and the accuracy on
+the target domain for a growing number of source domains.
+"""
+# License: BSD 3-Clause
+
+import warnings
+from time import perf_counter
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from skada import OTMappingAdapter, make_da_pipeline
+
+
+def make_multi_source(n_sources, n_samples_domain, random_state=0):
+    # each source domain is the target domain with its own translation
+    rng = np.random.RandomState(random_state)
+    X, y, sample_domain = [], [], []
+    for domain in range(n_sources + 1):
+        labels = rng.randint(2, size=n_samples_domain)
+        offset = rng.uniform(-3, 3, size=2) if domain > 0 else 0
+        X.append(rng.randn(n_samples_domain, 2) + 2 * labels[:, None] + offset)
+        y.append(labels)
+        sample_domain.append(np.full(n_samples_domain, domain if domain else -1))
+    return np.concatenate(X), np.concatenate(y), np.concatenate(sample_domain)
+
+
+def fit_pipeline(adapter, X, y, sample_domain, y_target):
+    pipe = make_da_pipeline(adapter, LogisticRegression())
+    start = perf_counter()
+    pipe.fit(X, y, sample_domain=sample_domain)
+    elapsed = perf_counter() - start
+    target = sample_domain < 0
+    y_pred = pipe.predict(X[target], sample_domain=sample_domain[target])
+    return elapsed, np.mean(y_pred == y_target)
+
+
+if __name__ == '__main__':
+    warnings.simplefilter('ignore', UserWarning)
+    print(
+        f"{'n sources':>9} {'mode':>18} {'fit (s)':>8} {'target acc':>11}"
+    )
+    for n_sources in [2, 4, 8]:
+        X, y, sample_domain = make_multi_source(n_sources, 1500)
+        target = sample_domain < 0
+        y_target = y[target].copy()
+        y[target] = -1
+        for name, params in [
+            ('single problem', {}),
+            ('per source', dict(per_source_domain=True)),
+            ('per source, 4 jobs', dict(per_source_domain=True, n_jobs=4)),
+        ]:
+            elapsed, accuracy = fit_pipeline(
+                OTMappingAdapter(**params), X, y, sample_domain, y_target
+            )
+            print(
+                f"{n_sources:>9} {name:>18} {elapsed:>8.3f} {accuracy:>11.3f}"
+            )
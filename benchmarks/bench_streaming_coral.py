@@ -0,0 +1,36 @@
+"""
+Benchmark of the streaming `partial_fit` of the CORAL and Gaussian
+re-weighting adapters.
+
+`partial_fit` only accumulates the statistics of the chunk, the covariances
+and their square roots are computed once, on the next call of `adapt`. This
+script compares the time of a single `fit` with the time to stream the same
+samples by chunks (followed by one `adapt`) for a growing number of chunks.
+"""
+# License: BSD 3-Clause
+
+from time import perf_counter
+
+import numpy as np
+
+from skada import CORALAdapter, GaussianReweightDensityAdapter
+
+
+if __name__ == '__main__':
+    rng = np.random.RandomState(0)
+    X = rng.randn(20000, 300)
+    sample_domain = np.repeat([1, -2], 10000)
+    rng.shuffle(sample_domain)
+    print(f"{'adapter':>32} {'n chunks':>8} {'time (s)':>9}")
+    for adapter_cls in [CORALAdapter, GaussianReweightDensityAdapter]:
+        start = perf_counter()
+        adapter_cls().fit(X, sample_domain=sample_domain)
+        print(f"{adapter_cls.__name__:>32} {'fit':>8} {perf_counter() - start:>9.3f}")
+        for n_chunks in [10, 100, 1000]:
+            adapter = adapter_cls()
+            start = perf_counter()
+            for chunk in np.array_split(np.arange(X.shape[0]), n_chunks):
+                adapter.partial_fit(X[chunk], sample_domain=sample_domain[chunk])
+            adapter.adapt(X[:10], sample_domain=sample_domain[:10])
+            elapsed = perf_counter() - start
+            print(f"{adapter_cls.__name__:>32} {n_chunks:>8} {elapsed:>9.3f}")
@@ -10,6 +10,13 @@ from .version import __version__  # noqa: F401
 from . import model_selection
 from . import metrics
 from .base import BaseAdapter, PerDomain, Shared
+from ._cache import (
+    FitCache,
+    clear_covariance_cache,
+    covariance_cache_info,
+    set_covariance_cache_size,
+)
+from ._density import ApproximateKernelDensity
 from ._mapping import (
     ClassRegularizerOTMappingAdapter,
     ClassRegularizerOTMapping,
@@ -17,6 +24,8 @@ from ._mapping import (
     CORAL,
     EntropicOTMappingAdapter,
     EntropicOTMapping,
+    FactoredOTMappingAdapter,
+    FactoredOTMapping,
     LinearOTMappingAdapter,
     LinearOTMapping,
     OTMappingAdapter,
@@ -39,7 +48,8 @@ from ._subspace import (
     TransferComponentAnalysis,
 )
 from ._ot import solve_jdot_regression, JDOTRegressor
-from ._pipeline import make_da_pipeline
+from ._pipeline import compile_da_pipeline, make_da_pipeline
+from ._profiling import profile_da_pipeline
 from .utils import source_target_split
 
 
@@ -54,6 +64,10 @@ __all__ = [
     "BaseAdapter",
     "PerDomain",
     "Shared",
+    "FitCache",
+    "clear_covariance_cache",
+    "covariance_cache_info",
+    "set_covariance_cache_size",
 
     "ClassRegularizerOTMappingAdapter",
     "ClassRegularizerOTMapping",
@@ -61,6 +75,8 @@ __all__ = [
     "CORAL",
     "EntropicOTMappingAdapter",
     "EntropicOTMapping",
+    "FactoredOTMappingAdapter",
+    "FactoredOTMapping",
     "LinearOTMappingAdapter",
     "LinearOTMapping",
     "OTMappingAdapter",
@@ -74,6 +90,7 @@ __all__ = [
     "KLIEP",
     "ReweightDensityAdapter",
     "ReweightDensity",
+    "ApproximateKernelDensity",
 
     "SubspaceAlignmentAdapter",
     "SubspaceAlignment",
@@ -83,7 +100,9 @@ __all__ = [
     "solve_jdot_regression",
     "JDOTRegressor",
 
+    "compile_da_pipeline",
     "make_da_pipeline",
+    "profile_da_pipeline",
 
     "source_target_split",
 ]
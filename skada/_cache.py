@@ -0,0 +1,267 @@
+# License: BSD 3-Clause
+
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+import joblib
+import numpy as np
+from scipy import sparse
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class FitCache:
+    """In-memory cache of estimators fitted by domain selectors.
+
+    Fitted estimators are keyed by a fingerprint of the selector type, the
+    base estimator class and parameters, and the fitting data (`X`, `y`,
+    `sample_domain` and the rest of the routed parameters). Selectors sharing
+    the cache, e.g. copies of the same pipeline created by a grid search,
+    re-use the fitted estimator instead of fitting it again. Thus expensive
+    adapters are fitted once when only the hyperparameters of downstream
+    estimators change.
+
+    The cache is shared by the copies of the estimator (it is not copied by
+    :func:`~sklearn.base.clone`), but not across processes: use a
+    thread-based joblib backend to share it between parallel jobs.
+
+    Cached estimators are returned as they are, they should not be modified.
+
+    Parameters
+    ----------
+    maxsize : int or None, default=32
+        The maximum number of fitted estimators to keep. The least recently
+        used ones are dropped first. ``None`` means that the cache is
+        unbounded.
+
+    Examples
+    --------
+    >>> from sklearn.linear_model import LogisticRegression
+    >>> from skada import FitCache, SubspaceAlignmentAdapter, make_da_pipeline
+    >>> from skada.datasets import make_shifted_datasets
+    >>> X, y, sample_domain = make_shifted_datasets(random_state=0)
+    >>> cache = FitCache()
+    >>> pipe = make_da_pipeline(
+    ...     SubspaceAlignmentAdapter(n_components=1),
+    ...     LogisticRegression(),
+    ...     fit_cache=cache,
+    ... )
+    >>> for C in [0.1, 1., 10.]:
+    ...     _ = pipe.set_params(logisticregression__C=C)
+    ...     _ = pipe.fit(X, y, sample_domain=sample_domain)
+    >>> cache.cache_info()
+    CacheInfo(hits=2, misses=4, maxsize=32, currsize=4)
+    """
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key):
+        """Get the fitted estimator for the `key`, if cached."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Cache the fitted estimator for the `key`."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return value
+
+    def cache_info(self) -> CacheInfo:
+        """Report the statistics of the cache.
+
+        Returns
+        -------
+        info : CacheInfo
+            Named tuple with the number of `hits` and `misses`, the `maxsize`
+            and the current number of cached estimators `currsize`.
+        """
+        with self._lock:
+            return CacheInfo(
+                self._hits, self._misses, self.maxsize, len(self._entries)
+            )
+
+    def cache_clear(self):
+        """Drop all cached estimators and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"FitCache(maxsize={self.maxsize})"
+
+    def __deepcopy__(self, memo):
+        # copies of the estimators (e.g. made by `clone`) share the cache
+        return self
+
+    def __getstate__(self):
+        # the lock can't be pickled, fitted estimators are not sent
+        # to other processes either
+        return {'maxsize': self.maxsize}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+class _ArrayCache:
+    """In-memory LRU cache of tuples of arrays bounded by their size in bytes.
+
+    Cached arrays are made read-only as they are shared by all the callers.
+    Values larger than `maxbytes` are not cached and are left writeable.
+    """
+
+    def __init__(self, maxbytes):
+        self.maxbytes = maxbytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        nbytes = sum(array.nbytes for array in value)
+        if self.maxbytes == 0 or nbytes > self.maxbytes:
+            return value
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+            # only the arrays actually shared are frozen
+            for array in value:
+                array.flags.writeable = False
+            self._entries[key] = value
+            self._nbytes += nbytes
+            self._evict()
+        return value
+
+    def resize(self, maxbytes):
+        with self._lock:
+            self.maxbytes = maxbytes
+            self._evict()
+
+    def _evict(self):
+        while self._nbytes > self.maxbytes:
+            _, dropped = self._entries.popitem(last=False)
+            self._nbytes -= sum(array.nbytes for array in dropped)
+
+    def cache_info(self) -> CacheInfo:
+        """Statistics of the cache, sizes are in bytes."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.maxbytes, self._nbytes)
+
+    def cache_clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            self._hits = 0
+            self._misses = 0
+
+
+# covariance estimates and eigendecompositions, keyed by a fingerprint of
+# their inputs, shared by the adapters (e.g. the candidates of a grid
+# search fitted on the same split) within the process
+_COVARIANCE_CACHE = _ArrayCache(maxbytes=256 * 2 ** 20)
+
+
+def set_covariance_cache_size(maxbytes):
+    """Set the maximum size of the covariance cache.
+
+    Covariance estimates and their eigendecompositions computed by the
+    adapters (e.g. :class:`~skada.CORALAdapter` and
+    :class:`~skada.GaussianReweightDensityAdapter`) are cached within the
+    process, keyed by a fingerprint of their inputs, so that adapters fitted
+    on the same samples (e.g. the candidates of a grid search) compute them
+    once. The least recently used entries are dropped first when the cache
+    exceeds its size, 256 MiB by default. Statistics accumulated by
+    `partial_fit` are never cached.
+
+    Parameters
+    ----------
+    maxbytes : int
+        The maximum size of the cached arrays, in bytes. ``0`` disables
+        the cache.
+    """
+    if maxbytes < 0:
+        raise ValueError(f"maxbytes should be non-negative, got {maxbytes}.")
+    _COVARIANCE_CACHE.resize(maxbytes)
+
+
+def clear_covariance_cache():
+    """Drop all the entries of the covariance cache and reset its statistics.
+
+    See :func:`set_covariance_cache_size` for a description of the cache.
+    """
+    _COVARIANCE_CACHE.cache_clear()
+
+
+def covariance_cache_info() -> CacheInfo:
+    """Report the statistics of the covariance cache.
+
+    See :func:`set_covariance_cache_size` for a description of the cache.
+
+    Returns
+    -------
+    info : CacheInfo
+        Named tuple with the number of `hits` and `misses`, the maximum size
+        `maxsize` and the current size `currsize` of the cache, in bytes.
+    """
+    return _COVARIANCE_CACHE.cache_info()
+
+
+def _fingerprint(*values) -> str:
+    """Fast fingerprint of the (nested) values.
+
+    Buffers of numerical arrays are hashed directly, other values are
+    hashed with :func:`joblib.hash`.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for value in values:
+        _update_fingerprint(h, value)
+    return h.hexdigest()
+
+
+def _update_fingerprint(h, value):
+    if isinstance(value, np.ndarray) and value.dtype.kind in 'biufc':
+        h.update(f'ndarray:{value.dtype.str}:{value.shape}'.encode())
+        h.update(np.ascontiguousarray(value))
+    elif sparse.issparse(value):
+        value = value.tocsr()
+        h.update(f'sparse:{value.shape}'.encode())
+        for array in (value.data, value.indices, value.indptr):
+            _update_fingerprint(h, array)
+    elif isinstance(value, dict):
+        h.update(f'dict:{len(value)}'.encode())
+        for k in sorted(value):
+            _update_fingerprint(h, k)
+            _update_fingerprint(h, value[k])
+    else:
+        h.update(joblib.hash(value).encode())
@@ -0,0 +1,246 @@
+# License: BSD 3-Clause
+
+from itertools import product
+
+import numpy as np
+from scipy.ndimage import map_coordinates
+from scipy.signal import fftconvolve
+from scipy.special import logsumexp
+from sklearn.base import BaseEstimator
+from sklearn.cluster import KMeans
+from sklearn.metrics.pairwise import euclidean_distances
+from sklearn.utils import check_array, gen_batches, get_chunk_n_rows
+from sklearn.utils.validation import check_is_fitted
+
+
+class ApproximateKernelDensity(BaseEstimator):
+    """Approximate Gaussian kernel density estimation.
+
+    Drop-in replacement of :class:`~sklearn.neighbors.KernelDensity` with a
+    Gaussian kernel (e.g. as the `weight_estimator` of
+    :class:`~skada.ReweightDensityAdapter`) whose cost grows linearly with
+    the number of samples. The density is approximated with one of the
+    following methods:
+
+    - 'binned': the samples are linearly binned on a regular grid with
+      `n_bins` points per dimension, convolved with the kernel by FFT.
+      Fit takes O(n_samples + n_bins^n_features log(n_bins)) time and
+      the log-density of a sample is interpolated from the grid in
+      O(2^n_features). Only suited to low dimensional data (up to 3
+      features).
+    - 'landmarks': the samples are summarized by `n_landmarks` k-means
+      centers, each one being a Gaussian whose variance is the one of the
+      kernel plus the variance of the samples of its cluster. Fit takes
+      O(n_samples * n_landmarks * n_features) time per k-means iteration
+      and the log-density of a sample is computed in
+      O(n_landmarks * n_features). With at least as many landmarks as
+      samples, the density is the exact kernel density.
+
+    `n_bins` and `n_landmarks` control the accuracy of the approximation.
+
+    Parameters
+    ----------
+    bandwidth : float or {'scott', 'silverman'}, default=1.0
+        The bandwidth of the kernel, see
+        :class:`~sklearn.neighbors.KernelDensity`.
+    method : {'auto', 'binned', 'landmarks'}, default='auto'
+        The approximation method. 'auto' uses 'binned' for data with at
+        most 2 features and 'landmarks' otherwise.
+    n_bins : int, default=128
+        The number of grid points per dimension of the 'binned' method.
+    n_landmarks : int, default=256
+        The number of landmarks of the 'landmarks' method.
+    random_state : int, RandomState instance or None, default=None
+        Controls the k-means clustering of the 'landmarks' method.
+
+    Attributes
+    ----------
+    bandwidth_ : float
+        The bandwidth of the kernel.
+    method_ : str
+        The approximation method used.
+    """
+
+    def __init__(
+        self,
+        bandwidth=1.0,
+        method='auto',
+        n_bins=128,
+        n_landmarks=256,
+        random_state=None,
+    ):
+        self.bandwidth = bandwidth
+        self.method = method
+        self.n_bins = n_bins
+        self.n_landmarks = n_landmarks
+        self.random_state = random_state
+
+    def fit(self, X, y=None):
+        """Fit the density model on the data.
+
+        Parameters
+        ----------
+        X : array-like, shape (n_samples, n_features)
+            The samples.
+        y : None
+            Ignored.
+
+        Returns
+        -------
+        self : object
+            Returns self.
+        """
+        X = check_array(X, dtype=np.float64)
+        n_samples, n_features = X.shape
+        if self.bandwidth == 'scott':
+            self.bandwidth_ = n_samples ** (-1 / (n_features + 4))
+        elif self.bandwidth == 'silverman':
+            self.bandwidth_ = (n_samples * (n_features + 2) / 4) ** (
+                -1 / (n_features + 4)
+            )
+        else:
+            self.bandwidth_ = float(self.bandwidth)
+
+        method = self.method
+        if method == 'auto':
+            method = 'binned' if n_features <= 2 else 'landmarks'
+        if method == 'binned':
+            if n_features > 3:
+                raise ValueError(
+                    "The 'binned' method supports at most 3 features, "
+                    f"got {n_features}."
+                )
+            self._fit_binned(X)
+        elif method == 'landmarks':
+            self._fit_landmarks(X)
+        else:
+            raise ValueError(
+                "method should be one of 'auto', 'binned' or 'landmarks', "
+                f"got {method!r}."
+            )
+        self.method_ = method
+        return self
+
+    def score_samples(self, X):
+        """Compute the log-density of the samples.
+
+        Parameters
+        ----------
+        X : array-like, shape (n_samples, n_features)
+            The samples.
+
+        Returns
+        -------
+        density : ndarray, shape (n_samples,)
+            The log-density of each sample.
+        """
+        check_is_fitted(self)
+        X = check_array(X, dtype=np.float64)
+        if self.method_ == 'binned':
+            return self._score_binned(X)
+        return self._score_landmarks(X)
+
+    def score(self, X, y=None):
+        """Compute the total log-likelihood of the samples.
+
+        Parameters
+        ----------
+        X : array-like, shape (n_samples, n_features)
+            The samples.
+        y : None
+            Ignored.
+
+        Returns
+        -------
+        logprob : float
+            The sum of the log-density of the samples.
+        """
+        return np.sum(self.score_samples(X))
+
+    def _fit_binned(self, X):
+        n_samples, n_features = X.shape
+        h, n_bins = self.bandwidth_, self.n_bins
+        shape = (n_bins,) * n_features
+        # the grid covers the samples and the bulk of their kernels
+        lower = X.min(axis=0) - 3 * h
+        step = (X.max(axis=0) + 3 * h - lower) / (n_bins - 1)
+
+        # linear binning: each sample is spread over the corners of its cell
+        position = (X - lower) / step
+        index = np.clip(np.floor(position).astype(np.intp), 0, n_bins - 2)
+        fraction = position - index
+        grid = np.zeros(n_bins ** n_features)
+        for corner in product((0, 1), repeat=n_features):
+            corner = np.array(corner)
+            weight = np.prod(np.where(corner, fraction, 1 - fraction), axis=1)
+            flat_index = np.ravel_multi_index(tuple((index + corner).T), shape)
+            grid += np.bincount(flat_index, weight, minlength=grid.size)
+        grid = grid.reshape(shape) / n_samples
+
+        # the Gaussian kernel is separable, it is applied axis by axis
+        for axis in range(n_features):
+            radius = min(int(np.ceil(4 * h / step[axis])), n_bins - 1)
+            offsets = np.arange(-radius, radius + 1) * step[axis]
+            kernel_shape = [1] * n_features
+            kernel_shape[axis] = -1
+            kernel = np.exp(-0.5 * (offsets / h) ** 2).reshape(kernel_shape)
+            grid = fftconvolve(grid, kernel, mode='same')
+        # values below the accuracy of the FFT are clipped
+        self._floor = np.finfo(np.float64).eps * grid.max()
+        self._grid = np.maximum(grid, self._floor)
+        self._lower = lower
+        self._step = step
+
+    def _score_binned(self, X):
+        n_features = X.shape[1]
+        position = (X - self._lower) / self._step
+        density = map_coordinates(
+            self._grid, position.T, order=1, mode='constant', cval=self._floor
+        )
+        density = np.maximum(density, self._floor)
+        return np.log(density) - n_features * np.log(
+            np.sqrt(2 * np.pi) * self.bandwidth_
+        )
+
+    def _fit_landmarks(self, X):
+        n_samples, n_features = X.shape
+        if n_samples <= self.n_landmarks:
+            # each sample is its own landmark, the density is exact
+            self._landmarks = X
+            self._log_weights = np.full(n_samples, -np.log(n_samples))
+            self._variances = np.full(n_samples, self.bandwidth_ ** 2)
+            return
+        kmeans = KMeans(
+            n_clusters=self.n_landmarks,
+            n_init=1,
+            random_state=self.random_state,
+        ).fit(X)
+        labels, centers = kmeans.labels_, kmeans.cluster_centers_
+        counts = np.bincount(labels, minlength=self.n_landmarks)
+        residuals = np.sum((X - centers[labels]) ** 2, axis=1)
+        spread = np.bincount(labels, residuals, minlength=self.n_landmarks)
+        used = counts > 0
+        self._landmarks = centers[used]
+        self._log_weights = np.log(counts[used] / n_samples)
+        self._variances = (
+            self.bandwidth_ ** 2 + spread[used] / (counts[used] * n_features)
+        )
+
+    def _score_landmarks(self, X):
+        n_features = X.shape[1]
+        n_landmarks = self._landmarks.shape[0]
+        log_norm = self._log_weights - 0.5 * n_features * np.log(
+            2 * np.pi * self._variances
+        )
+        density = np.empty(X.shape[0])
+        chunk_n_rows = get_chunk_n_rows(
+            row_bytes=8 * n_landmarks, max_n_rows=X.shape[0]
+        )
+        for batch in gen_batches(X.shape[0], chunk_n_rows):
+            sq_distances = euclidean_distances(
+                X[batch], self._landmarks, squared=True
+            )
+            density[batch] = logsumexp(
+                log_norm - sq_distances / (2 * self._variances), axis=1
+            )
+        return density
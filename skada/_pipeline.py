@@ -5,14 +5,27 @@
 # License: BSD 3-Clause
 
 from collections import defaultdict
+from functools import wraps
 
 from typing import Callable, Optional, Union
 
 from joblib import Memory
 from sklearn.base import BaseEstimator
 from sklearn.pipeline import Pipeline
+from sklearn.utils.metaestimators import available_if
+from sklearn.utils.validation import check_is_fitted
 
-from .base import BaseSelector, PerDomain, Shared
+from ._cache import FitCache
+from .base import (
+    AdaptationOutput,
+    BaseAdapter,
+    BaseSelector,
+    PerDomain,
+    Shared,
+    _densify_output,
+)
+from .utils import check_X_domain
+from ._utils import _call_scope
 
 
 _DEFAULT_SELECTORS = {
@@ -27,6 +40,7 @@ def make_da_pipeline(
     memory: Optional[Memory] = None,
     verbose: bool = False,
     default_selector: Union[str, Callable[[BaseEstimator], BaseSelector]] = 'shared',
+    fit_cache: Optional[FitCache] = None,
 ) -> Pipeline:
     """Construct a :class:`~sklearn.pipeline.Pipeline` from the given estimators.
 
@@ -61,10 +75,18 @@ def make_da_pipeline(
         callable that accepts :class:`~sklearn.base.BaseEstimator` and returns
         the estimator encapsulated within a domain selector.
 
+    fit_cache : FitCache, default=None
+        Cache of fitted estimators shared by all the steps of the pipeline
+        (unless a step already has its own `fit_cache`). Contrary to `memory`,
+        the cache is aware of domain selectors and `sample_domain`, so that
+        fitted adapters are re-used when only the parameters of the following
+        steps change. See :class:`~skada.FitCache` for details.
+
     Returns
     -------
     p : Pipeline
-        Returns a scikit-learn :class:`~sklearn.pipeline.Pipeline` object.
+        Returns a scikit-learn :class:`~sklearn.pipeline.Pipeline` object,
+        which also supports `partial_fit` when all of its steps do.
 
     Examples
     --------
@@ -72,12 +94,12 @@ def make_da_pipeline(
     >>> from sklearn.preprocessing import StandardScaler
     >>> from skada import make_da_pipeline
     >>> make_da_pipeline(StandardScaler(), GaussianNB(priors=None))
-    Pipeline(steps=[('standardscaler',
-                     Shared(base_estimator=StandardScaler(), copy=True,
-                            with_mean=True, with_std=True)),
-                    ('gaussiannb',
-                     Shared(base_estimator=GaussianNB(), priors=None,
-                            var_smoothing=1e-09))])
+    DAPipeline(steps=[('standardscaler',
+                       Shared(base_estimator=StandardScaler(), copy=True,
+                              with_mean=True, with_std=True)),
+                      ('gaussiannb',
+                       Shared(base_estimator=GaussianNB(), priors=None,
+                              var_smoothing=1e-09))])
     """
     # note that we generate names before wrapping estimators into the selector
     # xxx(okachaiev): unwrap from the selector when passed explicitly
@@ -88,13 +110,275 @@ def make_da_pipeline(
     estimators = [step[1] if isinstance(step, tuple) else step for step in steps]
 
     wrapped_estimators = _wrap_with_selectors(estimators, default_selector)
+    if fit_cache is not None:
+        for estimator in wrapped_estimators:
+            if estimator.fit_cache is None:
+                estimator.fit_cache = fit_cache
     steps = _name_estimators(wrapped_estimators)
     steps[-1][1]._mark_as_final()
     named_steps = [
         (auto_name, step) if user_name is None else (user_name, step)
         for user_name, (auto_name, step) in zip(names, steps)
     ]
-    return Pipeline(named_steps, memory=memory, verbose=verbose)
+    return DAPipeline(named_steps, memory=memory, verbose=verbose)
+
+
+def _steps_have_partial_fit(pipeline) -> bool:
+    return all(
+        hasattr(step, 'partial_fit')
+        for _, _, step in pipeline._iter(filter_passthrough=True)
+    )
+
+
+def _within_call_scope(method_name):
+    """Wrap the method of :class:`~sklearn.pipeline.Pipeline`, so that the
+    inputs validated by one of the steps are not validated again by the
+    following ones during the same call. Compact weights passed between the
+    steps are returned as dense arrays.
+    """
+    pipeline_method = getattr(Pipeline, method_name)
+
+    @wraps(pipeline_method)
+    def method(self, *args, **kwargs):
+        with _call_scope():
+            output = getattr(super(DAPipeline, self), method_name)(*args, **kwargs)
+        return _densify_output(output)
+
+    return available_if(
+        lambda self: hasattr(super(DAPipeline, self), method_name)
+    )(method)
+
+
+class DAPipeline(Pipeline):
+    """Pipeline of domain selectors, as created by :func:`make_da_pipeline`.
+
+    Extends :class:`~sklearn.pipeline.Pipeline` with `partial_fit`, so that
+    the pipeline is trained incrementally on batches of samples (e.g. data
+    streams that do not fit in memory).
+    """
+
+    fit = _within_call_scope('fit')
+    fit_transform = _within_call_scope('fit_transform')
+    fit_predict = _within_call_scope('fit_predict')
+    predict = _within_call_scope('predict')
+    predict_proba = _within_call_scope('predict_proba')
+    predict_log_proba = _within_call_scope('predict_log_proba')
+    decision_function = _within_call_scope('decision_function')
+    score_samples = _within_call_scope('score_samples')
+    score = _within_call_scope('score')
+    transform = _within_call_scope('transform')
+    inverse_transform = _within_call_scope('inverse_transform')
+
+    @available_if(_steps_have_partial_fit)
+    def partial_fit(self, X, y=None, **params):
+        """Incrementally fit the pipeline on a batch of samples.
+
+        Each step is updated with the batch, transformed by the previous
+        steps, and transforms it for the next one. As in `fit`, adapters
+        also transform the source samples of the batch. Parameters (e.g.
+        `sample_domain`) are given to every step, selectors route them to
+        the `partial_fit` method of their base estimators.
+
+        Parameters
+        ----------
+        X : array-like of shape (n_samples, n_features)
+            The batch of samples.
+        y : array-like of shape (n_samples,), default=None
+            The labels of the batch, masked for target samples.
+        **params : dict
+            Parameters routed to the steps, e.g. `sample_domain`.
+
+        Returns
+        -------
+        self : DAPipeline
+            The updated pipeline.
+        """
+        with _call_scope():
+            Xt = X
+            for _, _, step in self._iter(with_final=False, filter_passthrough=True):
+                Xt = step._partial_fit_transform(Xt, y, **params)
+            if self._final_estimator != 'passthrough':
+                self._final_estimator.partial_fit(Xt, y, **params)
+        return self
+
+
+class CompiledDAPipeline:
+    """Lightweight predictor built from a fitted DA pipeline.
+
+    Use :func:`compile_da_pipeline` to create it. The predictor holds the
+    fitted estimators of the pipeline and calls them directly: inputs are
+    validated once per call, adapters of :class:`~skada.base.Shared` steps
+    are called through `adapt`, and parameters are routed with the requests
+    of the fitted estimators. Steps wrapped with other selectors (e.g.
+    :class:`~skada.base.PerDomain`) or with `chunk_size` set keep dispatching
+    samples on their own.
+
+    The predictor does not track changes of the pipeline: it has to be
+    compiled again whenever the pipeline is re-fitted or its parameters
+    are changed.
+
+    Parameters
+    ----------
+    pipeline : Pipeline
+        The fitted pipeline, as created by :func:`make_da_pipeline`.
+    """
+
+    def __init__(self, pipeline: Pipeline):
+        selectors = [
+            (name, step) for name, step in pipeline.steps
+            if step is not None and step != 'passthrough'
+        ]
+        for name, step in selectors:
+            if not isinstance(step, BaseSelector):
+                raise ValueError(
+                    f"Step '{name}' is not wrapped into a domain selector, "
+                    "make sure the pipeline is created with `make_da_pipeline`."
+                )
+            check_is_fitted(step)
+        if not selectors:
+            raise ValueError("The pipeline has no steps to compile.")
+        self.steps_ = [_compile_step(step, 'transform') for _, step in selectors[:-1]]
+        self.final_step_ = selectors[-1][1]
+        # adapters reject source samples when transforming, the same way
+        # as the pipeline the predictor only accepts them without adapters
+        self.allow_source_ = not any(
+            isinstance(_get_base_estimator(step), BaseAdapter)
+            for _, step in selectors
+        )
+        self._final_methods = {}
+
+    def transform(self, X, sample_domain=None):
+        """Apply all the steps of the pipeline but the last one.
+
+        Parameters
+        ----------
+        X : array-like, shape (n_samples, n_features)
+            The data to transform.
+        sample_domain : array-like, shape (n_samples,), default=None
+            The domain labels. If not given, all samples are assumed to
+            come from the target domain.
+
+        Returns
+        -------
+        X_t : ndarray
+            The transformed data.
+        """
+        with _call_scope():
+            X, _ = self._transform(X, sample_domain)
+        return X
+
+    def _transform(self, X, sample_domain):
+        X, sample_domain = check_X_domain(
+            X,
+            sample_domain,
+            allow_auto_sample_domain=True,
+            allow_source=self.allow_source_,
+        )
+        params = {'sample_domain': sample_domain}
+        for method, request in self.steps_:
+            X = _call_step(method, request, X, params)
+            if isinstance(X, AdaptationOutput):
+                X = X['X']
+        return X, params
+
+    def predict(self, X, sample_domain=None):
+        """Predict with the final estimator of the pipeline.
+
+        Parameters
+        ----------
+        X : array-like, shape (n_samples, n_features)
+            The data to predict.
+        sample_domain : array-like, shape (n_samples,), default=None
+            The domain labels. If not given, all samples are assumed to
+            come from the target domain.
+
+        Returns
+        -------
+        y_pred : ndarray
+            The predictions, same as given by the pipeline.
+        """
+        return self._call_final('predict', X, sample_domain)
+
+    def predict_proba(self, X, sample_domain=None):
+        """Same as `predict` for the `predict_proba` of the final estimator."""
+        return self._call_final('predict_proba', X, sample_domain)
+
+    def predict_log_proba(self, X, sample_domain=None):
+        """Same as `predict` for the `predict_log_proba` of the final estimator."""
+        return self._call_final('predict_log_proba', X, sample_domain)
+
+    def decision_function(self, X, sample_domain=None):
+        """Same as `predict` for the `decision_function` of the final estimator."""
+        return self._call_final('decision_function', X, sample_domain)
+
+    def _call_final(self, method_name, X, sample_domain):
+        final = self._final_methods.get(method_name)
+        if final is None:
+            final = _compile_step(self.final_step_, method_name)
+            self._final_methods[method_name] = final
+        with _call_scope():
+            X, params = self._transform(X, sample_domain)
+            method, request = final
+            return _call_step(method, request, X, params)
+
+
+def compile_da_pipeline(pipeline: Pipeline) -> CompiledDAPipeline:
+    """Compile a fitted DA pipeline into a low-latency predictor.
+
+    The predictor gives the same results as the `predict`, `predict_proba`,
+    `predict_log_proba` and `decision_function` methods of the pipeline,
+    while bypassing the dispatch of the :class:`~sklearn.pipeline.Pipeline`,
+    the metadata routing and the per-step checks. It is meant for serving
+    (small) batches of target samples.
+
+    Parameters
+    ----------
+    pipeline : Pipeline
+        The fitted pipeline, as created by :func:`make_da_pipeline`.
+
+    Returns
+    -------
+    predictor : CompiledDAPipeline
+        The compiled predictor.
+
+    Examples
+    --------
+    >>> from sklearn.linear_model import LogisticRegression
+    >>> from skada import CORALAdapter, compile_da_pipeline, make_da_pipeline
+    >>> from skada.datasets import make_shifted_datasets
+    >>> X, y, sample_domain = make_shifted_datasets(random_state=0)
+    >>> pipe = make_da_pipeline(CORALAdapter(), LogisticRegression())
+    >>> pipe = pipe.fit(X, y, sample_domain=sample_domain)
+    >>> predictor = compile_da_pipeline(pipe)
+    >>> X_target = X[sample_domain < 0]
+    >>> (predictor.predict(X_target) == pipe.predict(X_target)).all()
+    True
+    """
+    return CompiledDAPipeline(pipeline)
+
+
+def _get_base_estimator(selector: BaseSelector) -> BaseEstimator:
+    return getattr(selector, 'base_estimator_', selector.base_estimator)
+
+
+def _compile_step(selector: BaseSelector, method_name: str):
+    """Resolve the callable and the metadata request used to call a fitted step."""
+    if isinstance(selector, Shared) and selector.chunk_size is None:
+        estimator = selector.base_estimator_
+        if method_name == 'transform' and isinstance(estimator, BaseAdapter):
+            # inputs are already checked, no need to go through `transform`
+            return estimator.adapt, None
+        return (
+            getattr(estimator, method_name),
+            getattr(selector.routing_, method_name),
+        )
+    # other selectors are responsible for dispatching (and chunking) samples
+    return getattr(selector, method_name), None
+
+
+def _call_step(method, request, X, params):
+    routed_params = params if request is None else request._route_params(params=params)
+    return method(X, **routed_params)
 
 
 def _wrap_with_selector(
@@ -0,0 +1,233 @@
+# License: BSD 3-Clause
+
+import time
+import tracemalloc
+from collections import namedtuple
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+
+from sklearn.utils.validation import _num_samples
+
+
+TraceEntry = namedtuple(
+    'TraceEntry',
+    [
+        'selector',
+        'estimator',
+        'method',
+        'domain',
+        'n_samples',
+        'n_features',
+        'wall_time',
+        'cpu_time',
+        'peak_memory',
+    ]
+)
+
+# trace collecting the entries in the current context, if any
+_ACTIVE_TRACE = ContextVar('skada_profiling_trace', default=None)
+
+_NOT_PROFILED = nullcontext()
+
+
+class ProfilingTrace:
+    """Trace of the calls made by domain selectors.
+
+    Created by :func:`profile_da_pipeline`. Each entry of the trace is a
+    :class:`TraceEntry` named tuple with:
+
+    - `selector`, `estimator`: class names of the selector and of the
+      estimator it calls,
+    - `method`: the method called (`fit`, `partial_fit`, `adapt`,
+      `transform`, `predict`, `score`, ...),
+    - `domain`: the domain label for the calls made by
+      :class:`~skada.base.PerDomain` for a single domain, None otherwise,
+    - `n_samples`, `n_features`: the shape of the input,
+    - `wall_time`, `cpu_time`: elapsed and CPU (of the whole process)
+      time in seconds,
+    - `peak_memory`: the peak of the memory allocated during the call in
+      bytes (as reported by :mod:`tracemalloc`), None if memory is not
+      traced.
+
+    Entries are listed in the order in which the calls start, thus
+    per-domain calls follow the entry of their selector.
+    """
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.entries = []
+        # baseline and peak observed so far for the calls in progress
+        self._memory_stack = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __repr__(self):
+        return f"ProfilingTrace(n_entries={len(self.entries)})"
+
+    @contextmanager
+    def _section(self, selector, estimator, method, X, domain):
+        position = len(self.entries)
+        self.entries.append(None)
+        if self.trace_memory:
+            self._start_memory()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - wall_start
+            cpu_time = time.process_time() - cpu_start
+            peak_memory = self._stop_memory() if self.trace_memory else None
+            n_samples, n_features = _input_shape(X)
+            self.entries[position] = TraceEntry(
+                selector,
+                type(estimator).__name__,
+                method,
+                domain,
+                n_samples,
+                n_features,
+                wall_time,
+                cpu_time,
+                peak_memory,
+            )
+
+    def _start_memory(self):
+        # tracemalloc keeps a single peak, it is reset for each call while
+        # the peak observed by the calls in progress is kept on the stack
+        current, peak = tracemalloc.get_traced_memory()
+        if self._memory_stack:
+            self._memory_stack[-1][1] = max(self._memory_stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        self._memory_stack.append([current, current])
+
+    def _stop_memory(self):
+        baseline, observed = self._memory_stack.pop()
+        peak = max(observed, tracemalloc.get_traced_memory()[1])
+        if self._memory_stack:
+            self._memory_stack[-1][1] = max(self._memory_stack[-1][1], peak)
+        return peak - baseline
+
+    def to_table(self) -> str:
+        """Format the trace as a text table.
+
+        Returns
+        -------
+        table : str
+            One row per entry, times in milliseconds and memory in KiB.
+        """
+        header = (
+            f"{'selector':<12} {'estimator':<32} {'method':<18} {'domain':>6} "
+            f"{'n_samples':>10} {'n_features':>10} {'wall (ms)':>10} "
+            f"{'cpu (ms)':>10} {'peak (KiB)':>11}"
+        )
+        rows = [header, '-' * len(header)]
+        for entry in self.entries:
+            if entry is None:
+                # the call is still in progress
+                continue
+            domain = '' if entry.domain is None else entry.domain
+            peak = (
+                '' if entry.peak_memory is None
+                else f"{entry.peak_memory / 1024:.1f}"
+            )
+            rows.append(
+                f"{entry.selector:<12} {entry.estimator:<32} {entry.method:<18} "
+                f"{domain:>6} {_format_dim(entry.n_samples):>10} "
+                f"{_format_dim(entry.n_features):>10} "
+                f"{entry.wall_time * 1e3:>10.2f} {entry.cpu_time * 1e3:>10.2f} "
+                f"{peak:>11}"
+            )
+        return '\n'.join(rows)
+
+
+@contextmanager
+def profile_da_pipeline(trace_memory: bool = True):
+    """Context manager recording the calls made by domain selectors.
+
+    Within the context, :class:`~skada.base.Shared` and
+    :class:`~skada.base.PerDomain` selectors (e.g. the steps of a pipeline
+    created by :func:`make_da_pipeline`) record the wall time, the CPU time,
+    the peak of allocated memory and the shape of the input of their calls
+    to `fit`, `partial_fit`, `adapt`, `transform`, `predict` (and the other
+    prediction methods) and `score`. :class:`~skada.base.PerDomain`
+    selectors also record the calls made for each domain. The trace is
+    specific to the context (e.g. the thread) it is created in: calls made
+    by parallel jobs (`domain_n_jobs`) are not recorded per domain.
+
+    Parameters
+    ----------
+    trace_memory : bool, default=True
+        Whether to record the peak of allocated memory with
+        :mod:`tracemalloc`, which is started for the duration of the
+        context unless it is already tracing. Tracing memory allocations
+        significantly slows down the calls.
+
+    Yields
+    ------
+    trace : ProfilingTrace
+        The trace, filled as the calls are made. Use `trace.entries` to get
+        the list of entries or `trace.to_table()` to format them.
+
+    Examples
+    --------
+    >>> from sklearn.linear_model import LogisticRegression
+    >>> from skada import CORALAdapter, make_da_pipeline, profile_da_pipeline
+    >>> from skada.datasets import make_shifted_datasets
+    >>> X, y, sample_domain = make_shifted_datasets(random_state=0)
+    >>> pipe = make_da_pipeline(CORALAdapter(), LogisticRegression())
+    >>> with profile_da_pipeline() as trace:
+    ...     _ = pipe.fit(X, y, sample_domain=sample_domain)
+    >>> [(entry.estimator, entry.method) for entry in trace.entries]
+    [('CORALAdapter', 'fit'), ('CORALAdapter', 'adapt'), \
+('LogisticRegression', 'fit')]
+    """
+    trace = ProfilingTrace(trace_memory=trace_memory)
+    start_tracing = trace_memory and not tracemalloc.is_tracing()
+    if start_tracing:
+        tracemalloc.start()
+    token = _ACTIVE_TRACE.set(trace)
+    try:
+        yield trace
+    finally:
+        _ACTIVE_TRACE.reset(token)
+        if start_tracing:
+            tracemalloc.stop()
+
+
+def _profiled(selector, estimator, method, X, domain=None):
+    """Context recording the call in the active trace, if any."""
+    trace = _ACTIVE_TRACE.get()
+    if trace is None:
+        return _NOT_PROFILED
+    return trace._section(selector, estimator, method, X, domain)
+
+
+def _profile_selector_method(method):
+    """Decorator recording the calls of the selector `method` in the
+    active trace, if any.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, X, *args, **params):
+            with _profiled(type(self).__name__, self.base_estimator, method, X):
+                return func(self, X, *args, **params)
+        return wrapper
+    return decorator
+
+
+def _input_shape(X):
+    if isinstance(X, dict):
+        # adaptation output
+        X = X['X']
+    shape = getattr(X, 'shape', None)
+    if shape is None:
+        return _num_samples(X), None
+    return shape[0], shape[1] if len(shape) > 1 else None
+
+
+def _format_dim(value):
+    return '' if value is None else value
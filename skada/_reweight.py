@@ -7,17 +7,23 @@
 import warnings
 
 import numpy as np
-from scipy.stats import multivariate_normal
+from scipy.stats import Covariance, multivariate_normal
+from sklearn.exceptions import NotFittedError
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics.pairwise import pairwise_kernels
 from sklearn.model_selection import check_cv
 from sklearn.neighbors import KernelDensity
-from sklearn.utils import check_random_state
+from sklearn.utils import check_random_state, gen_batches, get_chunk_n_rows
 from sklearn.utils.validation import check_is_fitted
 
-from .base import AdaptationOutput, BaseAdapter, clone
-from .utils import check_X_domain, source_target_split, extract_source_indices
-from ._utils import _estimate_covariance
+from .base import AdaptationOutput, BaseAdapter, _source_sample_weight, clone
+from .utils import check_X_domain, get_domain_index, source_target_split
+from ._utils import (
+    _CovarianceStatistics,
+    _eigh,
+    _estimate_covariance,
+    _get_float_dtype,
+)
 from ._pipeline import make_da_pipeline
 
 
@@ -31,7 +37,9 @@ class ReweightDensityAdapter(BaseAdapter):
     ----------
     weight_estimator : estimator object, optional
         The estimator to use to estimate the densities of source and target
-        observations. If None, a KernelDensity estimator is used.
+        observations. If None, a KernelDensity estimator is used. For large
+        datasets, :class:`~skada.ApproximateKernelDensity` estimates the
+        densities in time linear in the number of samples.
 
     Attributes
     ----------
@@ -41,6 +49,9 @@ class ReweightDensityAdapter(BaseAdapter):
         The estimator object fitted on the target data.
     """
 
+    # weights are normalized over the source samples of the input
+    _samplewise_adapt = False
+
     def __init__(self, weight_estimator=None):
         super().__init__()
         self.weight_estimator = weight_estimator or KernelDensity()
@@ -92,12 +103,14 @@ class ReweightDensityAdapter(BaseAdapter):
 
             X_t : array-like, shape (n_samples, n_components)
                 The data (same as X).
-            weights : array-like, shape (n_samples,)
-                The weights of the samples.
+            weights : ndarray, shape (n_samples,)
+                The weights of the samples (zero for target samples). Within
+                a pipeline, only the weights of source samples are passed to
+                the next step, as :class:`~skada.base.SourceSampleWeight`.
         """
         check_is_fitted(self)
         X, sample_domain = check_X_domain(X, sample_domain)
-        source_idx = extract_source_indices(sample_domain)
+        source_idx = get_domain_index(sample_domain).source_mask
 
         # xxx(okachaiev): move this to API
         if source_idx.sum() > 0:
@@ -106,8 +119,11 @@ class ReweightDensityAdapter(BaseAdapter):
             wt = self.weight_estimator_target_.score_samples(X[source_idx])
             source_weights = np.exp(wt - ws)
             source_weights /= source_weights.sum()
-            weights = np.zeros(X.shape[0], dtype=source_weights.dtype)
-            weights[source_idx] = source_weights
+            weights = _source_sample_weight(
+                source_idx,
+                source_weights.astype(_get_float_dtype(X), copy=False),
+                n_samples=X.shape[0],
+            )
         else:
             weights = None
         return AdaptationOutput(X=X, sample_weight=weights)
@@ -196,14 +212,102 @@ class GaussianReweightDensityAdapter(BaseAdapter):
             Returns self.
         """
         X, sample_domain = check_X_domain(X, sample_domain)
-        X_source, X_target = source_target_split(X, sample_domain=sample_domain)
+        X_source, X_target = source_target_split(
+            X, sample_domain=sample_domain, copy=False
+        )
 
         self.mean_source_ = X_source.mean(axis=0)
         self.cov_source_ = _estimate_covariance(X_source, shrinkage=self.reg)
         self.mean_target_ = X_target.mean(axis=0)
         self.cov_target_ = _estimate_covariance(X_target, shrinkage=self.reg)
+        self._source_stats = self._target_stats = None
+        self._stats_updated = False
+        return self
+
+    def partial_fit(self, X, y=None, sample_domain=None):
+        """Update adaptation parameters with a chunk of samples.
+
+        Means and covariances are estimated from the statistics of the source
+        and target samples accumulated over the chunks in O(n_features^2)
+        memory, see :meth:`CORALAdapter.partial_fit`. Only the statistics
+        are updated here, means and covariances are computed on the next
+        call of `adapt`, once both source and target samples are given; the
+        attributes are outdated until then. Calling `fit` discards the
+        statistics accumulated so far. Within a pipeline fitted
+        incrementally, batches are given unit weights until both source and
+        target samples were given, and the means and covariances used to
+        weight them are only derived again once the number of source or
+        target samples doubled.
+
+        Parameters
+        ----------
+        X : array-like, shape (n_samples, n_features)
+            The chunk of source and/or target data.
+        y : array-like, shape (n_samples,)
+            The source labels.
+        sample_domain : array-like, shape (n_samples,)
+            The domain labels (same as sample_domain).
+
+        Returns
+        -------
+        self : object
+            Returns self.
+        """
+        X, sample_domain = check_X_domain(X, sample_domain)
+        X_source, X_target = source_target_split(
+            X, sample_domain=sample_domain, copy=False
+        )
+        if getattr(self, '_source_stats', None) is None:
+            self._source_stats = _CovarianceStatistics()
+            self._target_stats = _CovarianceStatistics()
+            self._stats_n_derived = (0, 0)
+        self._source_stats.update(X_source)
+        self._target_stats.update(X_target)
+        self._stats_dtype = _get_float_dtype(X)
+        self._stats_updated = True
         return self
 
+    def __sklearn_is_fitted__(self):
+        return getattr(self, '_stats_updated', False) or hasattr(self, 'cov_source_')
+
+    def _update_from_stats(self, lazy=False):
+        """Derive the means and covariances from the statistics accumulated
+        by `partial_fit`, if they were updated since the last call. When
+        `lazy` is set, the ones derived before are kept until the number of
+        source or target samples doubled."""
+        if not getattr(self, '_stats_updated', False):
+            return
+        n_samples = (self._source_stats.n_samples, self._target_stats.n_samples)
+        if 0 in n_samples:
+            raise NotFittedError(
+                "Both source and target samples have to be given to "
+                "'partial_fit' before adapting samples."
+            )
+        if lazy and all(
+            n < 2 * n_derived
+            for n, n_derived in zip(n_samples, self._stats_n_derived)
+        ):
+            return
+        dtype = self._stats_dtype
+        self.mean_source_ = self._source_stats.mean.astype(dtype)
+        self.cov_source_ = self._source_stats.covariance(self.reg).astype(dtype)
+        self.mean_target_ = self._target_stats.mean.astype(dtype)
+        self.cov_target_ = self._target_stats.covariance(self.reg).astype(dtype)
+        # covariances of the streamed samples are not seen again, their
+        # eigendecompositions are kept here instead of being cached
+        self._stats_eighs = (
+            _eigh(self.cov_source_, cache=False),
+            _eigh(self.cov_target_, cache=False),
+        )
+        self._stats_n_derived = n_samples
+        self._stats_updated = False
+
+    def _covariance_eighs(self):
+        if getattr(self, '_source_stats', None) is not None:
+            return self._stats_eighs
+        # the eigendecompositions of the covariances are cached
+        return _eigh(self.cov_source_), _eigh(self.cov_target_)
+
     def adapt(self, X, y=None, sample_domain=None):
         """Predict adaptation (weights, sample or labels).
 
@@ -223,25 +327,46 @@ class GaussianReweightDensityAdapter(BaseAdapter):
 
             X_t : array-like, shape (n_samples, n_components)
                 The data (same as X).
-            weights : array-like, shape (n_samples,)
-                The weights of the samples.
+            weights : ndarray, shape (n_samples,)
+                The weights of the samples (zero for target samples). Within
+                a pipeline, only the weights of source samples are passed to
+                the next step, as :class:`~skada.base.SourceSampleWeight`.
         """
         check_is_fitted(self)
+        self._update_from_stats()
+        return self._reweight(X, sample_domain)
+
+    def _partial_fit_adapt(self, X, y=None, sample_domain=None):
+        if 0 in (self._source_stats.n_samples, self._target_stats.n_samples):
+            # the density ratio can not be estimated yet
+            return AdaptationOutput(X=X, sample_weight=None)
+        self._update_from_stats(lazy=True)
+        return self._reweight(X, sample_domain)
+
+    def _reweight(self, X, sample_domain):
         X, sample_domain = check_X_domain(X, sample_domain)
-        source_idx = extract_source_indices(sample_domain)
+        source_idx = get_domain_index(sample_domain).source_mask
 
         # xxx(okachaiev): move this to API
         if source_idx.sum() > 0:
             source_idx, = np.where(source_idx)
+            source_eigh, target_eigh = self._covariance_eighs()
             gaussian_target = multivariate_normal.pdf(
-                X[source_idx], self.mean_target_, self.cov_target_
+                X[source_idx],
+                self.mean_target_,
+                Covariance.from_eigendecomposition(target_eigh),
             )
             gaussian_source = multivariate_normal.pdf(
-                X[source_idx], self.mean_source_, self.cov_source_
+                X[source_idx],
+                self.mean_source_,
+                Covariance.from_eigendecomposition(source_eigh),
             )
             source_weights = gaussian_target / gaussian_source
-            weights = np.zeros(X.shape[0], dtype=source_weights.dtype)
-            weights[source_idx] = source_weights
+            weights = _source_sample_weight(
+                source_idx,
+                source_weights.astype(_get_float_dtype(X), copy=False),
+                n_samples=X.shape[0],
+            )
         else:
             weights = None
         return AdaptationOutput(X=X, sample_weight=weights)
@@ -333,7 +458,7 @@ class DiscriminatorReweightDensityAdapter(BaseAdapter):
             Returns self.
         """
         X, sample_domain = check_X_domain(X, sample_domain)
-        source_idx = extract_source_indices(sample_domain)
+        source_idx = get_domain_index(sample_domain).source_mask
         source_idx, = np.where(source_idx)
         y_domain = np.ones(X.shape[0], dtype=np.int32)
         y_domain[source_idx] = 0
@@ -361,19 +486,24 @@ class DiscriminatorReweightDensityAdapter(BaseAdapter):
 
             X_t : array-like, shape (n_samples, n_components)
                 The data (same as X).
-            weights : array-like, shape (n_samples,)
-                The weights of the samples.
+            weights : ndarray, shape (n_samples,)
+                The weights of the samples (zero for target samples). Within
+                a pipeline, only the weights of source samples are passed to
+                the next step, as :class:`~skada.base.SourceSampleWeight`.
         """
         check_is_fitted(self)
         X, sample_domain = check_X_domain(X, sample_domain)
-        source_idx = extract_source_indices(sample_domain)
+        source_idx = get_domain_index(sample_domain).source_mask
 
         # xxx(okachaiev): move this to API
         if source_idx.sum() > 0:
             source_idx, = np.where(source_idx)
             source_weights = self.domain_classifier_.predict_proba(X[source_idx])[:, 1]
-            weights = np.zeros(X.shape[0], dtype=source_weights.dtype)
-            weights[source_idx] = source_weights
+            weights = _source_sample_weight(
+                source_idx,
+                source_weights.astype(_get_float_dtype(X), copy=False),
+                n_samples=X.shape[0],
+            )
         else:
             weights = None
         return AdaptationOutput(X=X, sample_weight=weights)
@@ -504,7 +634,9 @@ class KLIEPAdapter(BaseAdapter):
             allow_multi_source=True,
             allow_multi_target=True
         )
-        X_source, X_target = source_target_split(X, sample_domain=sample_domain)
+        X_source, X_target = source_target_split(
+            X, sample_domain=sample_domain, copy=False
+        )
 
         if isinstance(self.gamma, list):
             self.best_gamma_ = self._likelihood_cross_validation(
@@ -591,24 +723,37 @@ class KLIEPAdapter(BaseAdapter):
 
             X_t : array-like, shape (n_samples, n_components)
                 The data (same as X).
-            weights : array-like, shape (n_samples,)
-                The weights of the samples.
+            weights : ndarray, shape (n_samples,)
+                The weights of the samples (zero for target samples). Within
+                a pipeline, only the weights of source samples are passed to
+                the next step, as :class:`~skada.base.SourceSampleWeight`.
         """
         check_is_fitted(self)
         X, sample_domain = check_X_domain(X, sample_domain)
-        source_idx = extract_source_indices(sample_domain)
+        source_idx = get_domain_index(sample_domain).source_mask
 
         if source_idx.sum() > 0:
             source_idx, = np.where(source_idx)
-            A = pairwise_kernels(
-                X[source_idx],
-                self.centers_,
-                metric="rbf",
-                gamma=self.best_gamma_
+            source_weights = np.empty(
+                source_idx.shape[0], dtype=_get_float_dtype(X)
+            )
+            # kernels are computed by chunks of rows,
+            # the size of each chunk is bounded by `working_memory`
+            chunk_n_rows = get_chunk_n_rows(
+                row_bytes=self.centers_.shape[0] * source_weights.itemsize,
+                max_n_rows=source_idx.shape[0],
+            )
+            for batch in gen_batches(source_idx.shape[0], chunk_n_rows):
+                A = pairwise_kernels(
+                    X[source_idx[batch]],
+                    self.centers_,
+                    metric="rbf",
+                    gamma=self.best_gamma_
+                )
+                source_weights[batch] = A @ self.alpha_
+            weights = _source_sample_weight(
+                source_idx, source_weights, n_samples=X.shape[0]
             )
-            source_weights = A @ self.alpha_
-            weights = np.zeros(X.shape[0], dtype=source_weights.dtype)
-            weights[source_idx] = source_weights
         else:
             weights = None
         return AdaptationOutput(X=X, sample_weight=weights)
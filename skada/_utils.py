@@ -5,18 +5,23 @@
 # License: BSD 3-Clause
 
 import logging
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
 from numbers import Real
 
 import numpy as np
 
 from sklearn.preprocessing import StandardScaler
 from sklearn.covariance import (
-    empirical_covariance,
     ledoit_wolf,
     shrunk_covariance,
 )
+from sklearn.utils.extmath import randomized_svd
 from sklearn.utils.multiclass import type_of_target
 
+from ._cache import _COVARIANCE_CACHE, _fingerprint
+
 
 _logger = logging.getLogger('skada')
 _logger.setLevel(logging.DEBUG)
@@ -32,10 +37,117 @@ _DEFAULT_TARGET_DOMAIN_ONLY_LABEL = -1
 _DEFAULT_MASKED_TARGET_CLASSIFICATION_LABEL = -1
 _DEFAULT_MASKED_TARGET_REGRESSION_LABEL = np.nan
 
+# values derived from the inputs of a single call (e.g. of a DA pipeline),
+# see `_call_scope`
+_CALL_SCOPE = ContextVar('skada_call_scope', default=None)
+
+
+class _Scope(dict):
+    """Entries of :class:`_IdentityCache` kept within a :func:`_call_scope`."""
+
+
+@contextmanager
+def _call_scope():
+    """Share the values derived from the input arrays within the block.
+
+    Entries of :class:`_IdentityCache` are only kept until the
+    outermost scope is left, or until their array is garbage collected.
+    The inputs are not expected to be modified in-place within the block,
+    e.g. while a pipeline is called on them. Nested scopes re-use the outer
+    one. The scope is not propagated to threads started within the block.
+    """
+    if _CALL_SCOPE.get() is not None:
+        yield
+        return
+    token = _CALL_SCOPE.set(_Scope())
+    try:
+        yield
+    finally:
+        _CALL_SCOPE.reset(token)
+
+
+class _IdentityCache:
+    """Cache of values derived from arrays, keyed by the identity of the array.
+
+    Entries are only kept within a :func:`_call_scope` and nothing is cached
+    outside of it, thus the arrays are not expected to be modified in-place
+    while the entries are in use. Only weak references to the arrays are
+    kept: intermediate arrays of a pipeline are not held until the end of
+    the call. Objects that do not support weak references (e.g. lists) are
+    never cached.
+    """
+
+    def get(self, array):
+        scope = _CALL_SCOPE.get()
+        entry = None if scope is None else scope.get((id(self), id(array)))
+        if entry is None or entry[0]() is not array:
+            return None
+        return entry[1]
+
+    def set(self, array, value):
+        scope = _CALL_SCOPE.get()
+        if scope is None:
+            return value
+        key = (id(self), id(array))
+        scope_ref = weakref.ref(scope)
+
+        def evict(ref):
+            # the id of the array can be re-used once it is collected
+            scope = scope_ref()
+            if scope is not None and scope.get(key, (None,))[0] is ref:
+                scope.pop(key, None)
+
+        try:
+            ref = weakref.ref(array, evict)
+        except TypeError:
+            return value
+        scope[key] = (ref, value)
+        return value
+
+
+def _compact_index_dtype(n_values):
+    """Smallest unsigned integer dtype able to index `n_values` values."""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if n_values <= np.iinfo(dtype).max + 1:
+            return np.dtype(dtype)
+    return np.dtype(np.uint64)
+
+
+def _get_float_dtype(X):
+    """Floating point dtype used for the computations on X.
+
+    float32 inputs are kept in single precision, everything else
+    (float64, integers, booleans) is computed in double precision.
+    """
+    if getattr(X, 'dtype', None) == np.float32:
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+
+def _empirical_covariance(X):
+    # same as :func:`~sklearn.covariance.empirical_covariance` except
+    # that the dtype of the input is preserved (`np.cov` upcasts to float64)
+    X = np.asarray(X)
+    if X.ndim == 1:
+        X = X.reshape(-1, 1)
+    covariance = np.cov(X.T, bias=1, dtype=_get_float_dtype(X))
+    if covariance.ndim == 0:
+        covariance = np.array([[covariance]])
+    return covariance
+
 
 def _estimate_covariance(X, shrinkage):
+    """Covariance of the samples `X`, cached in `_COVARIANCE_CACHE`.
+
+    The returned array is read-only when cached.
+    """
+    key = _fingerprint('covariance', X, shrinkage)
+    cached = _COVARIANCE_CACHE.get(key)
+    if cached is not None:
+        return cached[0]
+    dtype = _get_float_dtype(X)
     if shrinkage is None:
-        s = empirical_covariance(X)
+        s = _empirical_covariance(X)
     elif shrinkage == "auto":
         sc = StandardScaler()  # standardize features
         X = sc.fit_transform(X)
@@ -43,8 +155,255 @@ def _estimate_covariance(X, shrinkage):
         # rescale
         s = sc.scale_[:, np.newaxis] * s * sc.scale_[np.newaxis, :]
     elif isinstance(shrinkage, Real):
-        s = shrunk_covariance(empirical_covariance(X), shrinkage)
-    return s
+        s = shrunk_covariance(_empirical_covariance(X), shrinkage)
+    return _COVARIANCE_CACHE.set(key, (s.astype(dtype),))[0]
+
+
+def _eigh(C, cache=True):
+    """Eigendecomposition of the symmetric matrix `C` in double precision,
+    cached in `_COVARIANCE_CACHE` unless `cache` is False (e.g. for matrices
+    which are not expected to be seen again).
+
+    The returned arrays are read-only when cached.
+    """
+    if not cache:
+        return np.linalg.eigh(np.asarray(C, dtype=np.float64))
+    key = _fingerprint('eigh', C)
+    cached = _COVARIANCE_CACHE.get(key)
+    if cached is not None:
+        return cached
+    return _COVARIANCE_CACHE.set(
+        key, tuple(np.linalg.eigh(np.asarray(C, dtype=np.float64)))
+    )
+
+
+class _CovarianceStatistics:
+    """Sufficient statistics for the covariance estimators.
+
+    Accumulates the number of samples, and the sums of the products of up to
+    four features (scatter matrix, third and fourth order cross moments of
+    pairs of features) of the samples given chunk by chunk, so that the
+    output of :func:`_estimate_covariance` for every `shrinkage` (including
+    Ledoit-Wolf shrinkage of the standardized features) is computed in
+    O(n_features^2) memory, without the full data. The samples are shifted
+    by the mean of the first chunk (the shifted data algorithm, see [1]_),
+    which keeps the sums numerically stable as long as the shift is close to
+    the mean: updating the statistics only adds the products of the samples
+    of the chunk, and the centered moments are derived once, when the
+    covariance is computed. Statistics are accumulated in double precision.
+
+    References
+    ----------
+    .. [1] Tony F. Chan, Gene H. Golub and Randall J. LeVeque. Algorithms for
+           computing the sample variance: analysis and recommendations.
+           The American Statistician, 1983.
+    """
+
+    def __init__(self):
+        self.n_samples = 0
+        self.shift = None
+        # sums over samples of u_j, u_j * u_k, u_j^2 * u_k and u_j^2 * u_k^2
+        # for the shifted samples u
+        self.s1 = None
+        self.s11 = None
+        self.s21 = None
+        self.s22 = None
+
+    @classmethod
+    def from_data(cls, X):
+        """Statistics of the samples `X`."""
+        return cls().update(X)
+
+    @property
+    def mean(self):
+        return self.shift + self.s1 / self.n_samples
+
+    def update(self, X):
+        """Add the samples `X` to the statistics, in
+        O(n_samples * n_features^2) time.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+        if X.shape[0] == 0:
+            return self
+        if self.n_samples == 0:
+            self.shift = X.mean(axis=0)
+        U = X - self.shift
+        U2 = U ** 2
+        sums = (U.sum(axis=0), U.T @ U, U2.T @ U, U2.T @ U2)
+        if self.n_samples == 0:
+            self.s1, self.s11, self.s21, self.s22 = sums
+        else:
+            for total, chunk_sum in zip((self.s1, self.s11, self.s21, self.s22), sums):
+                total += chunk_sum
+        self.n_samples += X.shape[0]
+        return self
+
+    def _centered_moments(self):
+        # sums over samples of c_j * c_k and c_j^2 * c_k^2 for the samples
+        # c centered at the mean, given c = u - t
+        n_samples, t = self.n_samples, self.s1 / self.n_samples
+        v, t2 = np.diag(self.s11), t ** 2
+        m11 = self.s11 - n_samples * np.outer(t, t)
+        m22 = (
+            self.s22
+            - 2 * self.s21 * t[np.newaxis, :]
+            - 2 * self.s21.T * t[:, np.newaxis]
+            + np.outer(v, t2)
+            + np.outer(t2, v)
+            + 4 * np.outer(t, t) * self.s11
+            - 3 * n_samples * np.outer(t2, t2)
+        )
+        return m11, m22
+
+    def covariance(self, shrinkage):
+        """Covariance estimated from the statistics, same as
+        :func:`_estimate_covariance` on the accumulated samples.
+        """
+        n_samples, n_features = self.n_samples, self.s11.shape[0]
+        m11, m22 = self._centered_moments()
+        emp_cov = m11 / n_samples
+        if shrinkage is None:
+            return emp_cov
+        elif isinstance(shrinkage, Real):
+            return shrunk_covariance(emp_cov, shrinkage)
+        # Ledoit-Wolf shrinkage of the standardized features,
+        # see :func:`sklearn.covariance.ledoit_wolf_shrinkage`
+        scale = np.sqrt(np.diag(emp_cov))
+        scale[scale < 10 * np.finfo(scale.dtype).eps] = 1.
+        emp_cov = emp_cov / np.outer(scale, scale)
+        if n_features == 1:
+            return emp_cov * np.outer(scale, scale)
+        w = 1. / scale ** 2
+        emp_cov_trace = np.diag(emp_cov)
+        mu = np.sum(emp_cov_trace) / n_features
+        beta_ = w @ m22 @ w
+        delta_ = np.sum(emp_cov ** 2)
+        beta = 1. / (n_features * n_samples) * (beta_ / n_samples - delta_)
+        delta = delta_ - 2. * mu * emp_cov_trace.sum() + n_features * mu ** 2
+        delta /= n_features
+        beta = min(beta, delta)
+        lw_shrinkage = 0 if beta == 0 else beta / delta
+        s = (1. - lw_shrinkage) * emp_cov
+        s.flat[::n_features + 1] += lw_shrinkage * mu
+        # rescale
+        return scale[:, np.newaxis] * s * scale[np.newaxis, :]
+
+
+class _LowRankCovariance:
+    """Covariance modeled as a rank-k factor plus an isotropic residual.
+
+    The covariance is ``V diag(eigenvalues) V^T + noise_variance (I - V V^T)``
+    where the columns of V (`components`, shape (n_features, n_components))
+    are the top principal directions of the data, found with a randomized
+    SVD, and `noise_variance` is the average variance of the data in the
+    other directions. Powers of the covariance are applied to samples in
+    O(n_features * n_components) without forming (n_features, n_features)
+    matrices.
+    """
+
+    def __init__(self, components, eigenvalues, noise_variance):
+        self.components = components
+        self.eigenvalues = eigenvalues
+        self.noise_variance = noise_variance
+
+    @classmethod
+    def from_data(cls, X, n_components, shrinkage, random_state=None):
+        """Estimate the model from the samples `X`.
+
+        Shrinkage is the same as for :func:`_estimate_covariance`, except
+        that the Ledoit-Wolf shrinkage ('auto') is estimated on the features
+        as they are (not standardized), using the squared Frobenius norm of
+        the modeled covariance instead of the empirical one.
+        """
+        dtype = _get_float_dtype(X)
+        X = np.asarray(X, dtype=dtype)
+        n_samples, n_features = X.shape
+        n_components = min(n_components, n_samples, n_features)
+        X = X - X.mean(axis=0)
+        _, singular_values, components = randomized_svd(
+            X, n_components, random_state=random_state
+        )
+        eigenvalues = singular_values.astype(np.float64) ** 2 / n_samples
+        sq_norms = np.einsum('ij,ij->i', X, X, dtype=np.float64)
+        mu = sq_norms.sum() / (n_samples * n_features)
+        n_residual = n_features - n_components
+        noise_variance = 0.
+        if n_residual > 0:
+            residual = n_features * mu - eigenvalues.sum()
+            noise_variance = max(residual, 0.) / n_residual
+        if shrinkage == 'auto':
+            sq_frobenius = np.sum(eigenvalues ** 2) + n_residual * noise_variance ** 2
+            shrinkage = _ledoit_wolf_shrinkage(sq_norms, sq_frobenius, n_features)
+        if shrinkage:
+            eigenvalues = (1. - shrinkage) * eigenvalues + shrinkage * mu
+            noise_variance = (1. - shrinkage) * noise_variance + shrinkage * mu
+        return cls(components.T.astype(dtype, copy=False), eigenvalues, noise_variance)
+
+    def dot_power(self, X, power):
+        """Product of the samples `X` with the `power` of the covariance."""
+        n_features, n_components = self.components.shape
+        projected = X @ self.components
+        if n_components == n_features:
+            scales = self.eigenvalues ** power
+            return (projected * scales.astype(X.dtype)) @ self.components.T
+        noise = self.noise_variance ** power
+        scales = self.eigenvalues ** power - noise
+        return (
+            X.dtype.type(noise) * X
+            + (projected * scales.astype(X.dtype)) @ self.components.T
+        )
+
+
+def _ledoit_wolf_shrinkage(sq_norms, sq_frobenius, n_features):
+    """Ledoit-Wolf shrinkage coefficient from the squared norms of the
+    centered samples and the squared Frobenius norm of their covariance,
+    see :func:`sklearn.covariance.ledoit_wolf_shrinkage`.
+    """
+    if n_features == 1:
+        return 0.
+    n_samples = sq_norms.shape[0]
+    mu = sq_norms.sum() / (n_samples * n_features)
+    beta = (np.sum(sq_norms ** 2) / n_samples - sq_frobenius)
+    beta /= n_features * n_samples
+    delta = (sq_frobenius - n_features * mu ** 2) / n_features
+    beta = min(beta, delta)
+    return 0. if beta == 0 else beta / delta
+
+
+def _group_by_domain(sample_domain):
+    """Group sample indices by domain label in a single sorting pass.
+
+    The grouping is stored in a CSR-like layout: indices of the samples
+    from the domain ``labels[i]`` are ``permutation[offsets[i]:offsets[i+1]]``
+    (in increasing order). The same permutation could be used both to slice
+    the inputs per domain and to scatter per-domain outputs back.
+
+    Parameters
+    ----------
+    sample_domain : array-like of shape (n_samples,)
+        Domain labels for each sample.
+
+    Returns
+    -------
+    labels : ndarray of shape (n_domains,)
+        Sorted unique domain labels.
+    offsets : ndarray of shape (n_domains + 1,)
+        Offsets of each domain group within the permutation.
+    permutation : ndarray of shape (n_samples,)
+        Indices of the samples sorted by domain label.
+    """
+    sample_domain = np.asarray(sample_domain).reshape(-1)
+    n_samples = sample_domain.shape[0]
+    permutation = np.argsort(sample_domain, kind='stable')
+    sorted_domain = sample_domain[permutation]
+    is_start = np.ones(n_samples, dtype=bool)
+    np.not_equal(sorted_domain[1:], sorted_domain[:-1], out=is_start[1:])
+    starts = np.flatnonzero(is_start)
+    labels = sorted_domain[starts]
+    offsets = np.append(starts, n_samples)
+    return labels, offsets, permutation
 
 
 def _check_y_masking(y):
@@ -77,10 +436,17 @@ def _check_y_masking(y):
             return y_type
 
 
+# inferred label types, computing them requires a full scan
+# of the labels (see :func:`~sklearn.utils.multiclass.type_of_target`),
+# shared by the steps of a pipeline call
+_Y_TYPE_CACHE = _IdentityCache()
+
+
 def _find_y_type(y):
     """
     Find the type of the labels. They can either be continuous or
-    classification.
+    classification. The type is cached per labels array within
+    a pipeline call.
 
     Parameters
     ----------
@@ -93,6 +459,57 @@ def _find_y_type(y):
         Type of labels between 'continuous' and 'classification'
     """
 
+    y_type = _Y_TYPE_CACHE.get(y)
+    if y_type is None:
+        y_type = _Y_TYPE_CACHE.set(y, _infer_y_type(y))
+    return y_type
+
+
+# positions of the samples with non-masked labels, shared by the steps
+# of a pipeline call
+_LABELED_SAMPLES_CACHE = _IdentityCache()
+
+
+def _find_labeled_samples(y):
+    """
+    Find the positions of the samples with non-masked labels. The result
+    is cached per labels array within a pipeline call.
+
+    When the labeled samples form a contiguous block (e.g. source domains
+    packed before target domains), a slice is returned so that indexing
+    the inputs gives views instead of copies.
+
+    Parameters
+    ----------
+    y : array-like of shape (n_samples,)
+        Labels for the data
+
+    Returns
+    -------
+    labeled : slice or ndarray of shape (n_labeled,)
+        Slice or integer indices of the labeled samples.
+    """
+    labeled = _LABELED_SAMPLES_CACHE.get(y)
+    if labeled is None:
+        labeled = _LABELED_SAMPLES_CACHE.set(y, _infer_labeled_samples(y))
+    return labeled
+
+
+def _infer_labeled_samples(y):
+    if _find_y_type(y) == 'classification':
+        mask = np.asarray(y) != _DEFAULT_MASKED_TARGET_CLASSIFICATION_LABEL
+    else:
+        mask = np.isfinite(y)
+    indices = np.flatnonzero(mask)
+    if indices.shape[0] == 0:
+        return slice(0, 0)
+    start, stop = int(indices[0]), int(indices[-1]) + 1
+    if stop - start == indices.shape[0]:
+        return slice(start, stop)
+    return indices
+
+
+def _infer_y_type(y):
     # We need to check for this case first because
     # type_of_target() doesn't handle nan values
     if np.any(np.isnan(y)):
@@ -5,18 +5,25 @@
 # License: BSD 3-Clause
 
 from abc import abstractmethod
-from typing import Union
+from copy import deepcopy
+from typing import Optional, Union
 
 import numpy as np
+from numpy.lib.mixins import NDArrayOperatorsMixin
+from scipy import sparse
 from sklearn.base import BaseEstimator, clone
 from sklearn.exceptions import UnsetMetadataPassedError
-from sklearn.utils import Bunch
+from sklearn.utils import Bunch, gen_batches
 from sklearn.utils.metadata_routing import get_routing_for_object
 from sklearn.utils.metaestimators import available_if
-from sklearn.utils.validation import check_is_fitted
+from sklearn.utils.parallel import Parallel, delayed
+from sklearn.utils.validation import _num_samples, check_is_fitted
+from joblib import effective_n_jobs
 
-from skada.utils import check_X_domain
-from skada._utils import _DEFAULT_MASKED_TARGET_CLASSIFICATION_LABEL, _find_y_type
+from skada.utils import check_X_domain, get_domain_index
+from skada._cache import FitCache, _fingerprint
+from skada._profiling import _profile_selector_method, _profiled
+from skada._utils import _CALL_SCOPE, _find_labeled_samples
 
 
 def _estimator_has(attr):
@@ -46,6 +53,137 @@ class AdaptationOutput(Bunch):
     pass
 
 
+class SourceSampleWeight(NDArrayOperatorsMixin):
+    """Sample weights given only for source samples, zero for the others.
+
+    Compact counterpart of a dense array of weights, used to pass the
+    weights of re-weighting adapters between the steps of a pipeline: only
+    the weights of the source samples are stored. Adapters called outside
+    of a pipeline, as well as the outputs returned by a pipeline, give the
+    dense :class:`numpy.ndarray` instead, see :func:`_source_sample_weight`.
+
+    The dense array is materialized when the object is converted with
+    :func:`numpy.asarray` (e.g. by the estimator consuming the weights)
+    or used in numpy operations. Indexing only materializes the selected
+    samples, thus selecting source samples (which selectors do when removing
+    masked target labels) does not allocate an array for the full input.
+    Other :class:`numpy.ndarray` methods are not provided.
+
+    Parameters
+    ----------
+    indices : array-like of shape (n_source_samples,)
+        Indices of the source samples.
+    values : array-like of shape (n_source_samples,)
+        Weights of the source samples.
+    n_samples : int
+        Total number of samples.
+    """
+
+    def __init__(self, indices, values, n_samples: int):
+        indices = np.asarray(indices, dtype=np.intp).reshape(-1)
+        values = np.asarray(values).reshape(-1)
+        if indices.shape != values.shape:
+            raise ValueError(
+                f"Got {indices.shape[0]} indices and {values.shape[0]} weights."
+            )
+        if indices.shape[0] > 1 and np.any(indices[1:] < indices[:-1]):
+            order = np.argsort(indices, kind='stable')
+            indices, values = indices[order], values[order]
+        self.indices = indices
+        self.values = values
+        self.n_samples = n_samples
+
+    @property
+    def shape(self):
+        return (self.n_samples,)
+
+    @property
+    def ndim(self):
+        return 1
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    def __len__(self):
+        return self.n_samples
+
+    def __array__(self, dtype=None, copy=None):
+        weights = self.toarray()
+        if dtype is None:
+            return weights
+        return weights.astype(dtype, copy=False)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        inputs = tuple(
+            x.toarray() if isinstance(x, SourceSampleWeight) else x
+            for x in inputs
+        )
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def toarray(self) -> np.ndarray:
+        """Materialize the dense array of weights."""
+        weights = np.zeros(self.n_samples, dtype=self.dtype)
+        weights[self.indices] = self.values
+        return weights
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            position = key + self.n_samples if key < 0 else key
+            loc = np.searchsorted(self.indices, position)
+            if loc < self.indices.shape[0] and self.indices[loc] == position:
+                return self.values[loc]
+            return self.dtype.type(0)
+        if isinstance(key, slice):
+            positions = np.arange(*key.indices(self.n_samples))
+        else:
+            key = np.asarray(key)
+            if key.dtype == bool:
+                positions = np.flatnonzero(key)
+            else:
+                positions = np.where(key < 0, key + self.n_samples, key)
+        if np.array_equal(positions, self.indices):
+            return self.values.copy()
+        weights = np.zeros(positions.shape[0], dtype=self.dtype)
+        if self.indices.shape[0] > 0:
+            loc = np.minimum(
+                np.searchsorted(self.indices, positions),
+                self.indices.shape[0] - 1
+            )
+            found = self.indices[loc] == positions
+            weights[found] = self.values[loc[found]]
+        return weights
+
+    def __repr__(self):
+        return (
+            f"SourceSampleWeight(n_samples={self.n_samples}, "
+            f"n_source_samples={self.indices.shape[0]}, dtype={self.dtype})"
+        )
+
+
+def _source_sample_weight(indices, values, n_samples: int):
+    """Weights of the source samples, zero for the other samples.
+
+    Within a pipeline call, the weights are kept compact as
+    :class:`SourceSampleWeight`, as they are only consumed by the following
+    steps. Otherwise, the dense array is returned.
+    """
+    if _CALL_SCOPE.get() is not None:
+        return SourceSampleWeight(indices, values, n_samples=n_samples)
+    weights = np.zeros(n_samples, dtype=values.dtype)
+    weights[indices] = values
+    return weights
+
+
+def _densify_output(output):
+    """Materialize the compact weights of an output returned to the user."""
+    if isinstance(output, AdaptationOutput):
+        for key, value in output.items():
+            if isinstance(value, SourceSampleWeight):
+                output[key] = value.toarray()
+    return output
+
+
 class IncompatibleMetadataError(UnsetMetadataPassedError):
     """The exception is designated to report the situation when the adapter output
     the key, like 'sample_weight', that is not explicitly consumed by the following
@@ -63,8 +201,14 @@ class IncompatibleMetadataError(UnsetMetadataPassedError):
 class BaseAdapter(BaseEstimator):
 
     __metadata_request__fit = {'sample_domain': True}
+    __metadata_request__partial_fit = {'sample_domain': True}
     __metadata_request__transform = {'sample_domain': True, 'allow_source': True}
 
+    # whether the output of `adapt` for a sample only depends on the sample
+    # itself, so that selectors could adapt the input by chunks, see
+    # `chunk_size` of :class:`BaseSelector`
+    _samplewise_adapt = True
+
     @abstractmethod
     def adapt(
         self,
@@ -102,6 +246,13 @@ class BaseAdapter(BaseEstimator):
             **params
         )
 
+    def _partial_fit_adapt(self, X, y=None, sample_domain=None, **params):
+        """Adapt a batch given to `partial_fit`, when the adapter is fitted
+        incrementally within a pipeline: the output is used to update the
+        following steps. By default, the batch is adapted as by `adapt`.
+        """
+        return self.adapt(X, y=y, sample_domain=sample_domain, **params)
+
     def transform(
         self,
         X,
@@ -152,17 +303,54 @@ class DAEstimator(BaseEstimator):
 
 
 class BaseSelector(BaseEstimator):
+    """Base class for domain selectors.
+
+    Parameters
+    ----------
+    base_estimator : estimator object
+        The estimator wrapped by the selector.
+    chunk_size : int, default=None
+        If given, inference methods (`transform`, `predict`, `predict_proba`,
+        `predict_log_proba` and `decision_function`) process the input by
+        chunks of at most `chunk_size` samples, so that memory used by the
+        base estimator is bounded regardless of the number of samples.
+        ``None`` means that the input is processed at once. Adapters whose
+        output depends on the whole input (e.g. weights normalized over the
+        source samples) always transform it at once.
+    fit_cache : FitCache, default=None
+        If given, estimators fitted by the selector are stored in the cache
+        and re-used when the same base estimator is fitted on the same data
+        again, see :class:`~skada.FitCache`.
+    **kwargs : dict
+        Parameters of the base estimator.
+    """
 
-    def __init__(self, base_estimator: BaseEstimator, **kwargs):
+    # names of the parameters that are owned by the selector itself
+    # rather than being forwarded to the base estimator
+    _selector_params = ('chunk_size', 'fit_cache')
+
+    def __init__(
+        self,
+        base_estimator: BaseEstimator,
+        chunk_size: Optional[int] = None,
+        fit_cache: Optional[FitCache] = None,
+        **kwargs
+    ):
         super().__init__()
         self.base_estimator = base_estimator
         self.base_estimator.set_params(**kwargs)
+        self.chunk_size = chunk_size
+        self.fit_cache = fit_cache
         self._is_final = False
 
     # xxx(okachaiev): should this be a metadata routing object instead of request?
     def get_metadata_routing(self):
+        # always derived from the base estimator, as its requests might be
+        # changed after the selector is fitted (e.g. before re-fitting it)
         request = get_routing_for_object(self.base_estimator)
         request.fit.add_request(param='sample_domain', alias=True)
+        if hasattr(self.base_estimator, 'partial_fit'):
+            request.partial_fit.add_request(param='sample_domain', alias=True)
         request.transform.add_request(param='sample_domain', alias=True)
         request.predict.add_request(param='sample_domain', alias=True)
         if hasattr(self.base_estimator, 'predict_proba'):
@@ -201,6 +389,8 @@ class BaseSelector(BaseEstimator):
         """
         params = self.base_estimator.get_params(deep=deep)
         params['base_estimator'] = self.base_estimator
+        for name in self._selector_params:
+            params[name] = getattr(self, name)
         return params
 
     def set_params(self, base_estimator=None, **kwargs):
@@ -222,6 +412,9 @@ class BaseSelector(BaseEstimator):
         """
         if base_estimator is not None:
             self.base_estimator = base_estimator
+        for name in self._selector_params:
+            if name in kwargs:
+                setattr(self, name, kwargs.pop(name))
         self.base_estimator.set_params(**kwargs)
         return self
 
@@ -231,29 +424,78 @@ class BaseSelector(BaseEstimator):
         the input and the routing logic associated with domain labels.
         """
 
+    def _partial_fit_transform(self, X, y=None, **params):
+        """Internal API for the steps of a pipeline fitted incrementally:
+        updates the selector with the batch, then transforms it.
+        """
+        self.partial_fit(X, y, **params)
+        return self.transform(X, **params)
+
     @available_if(_estimator_has('transform'))
     def transform(self, X, **params):
-        return self._route_to_estimator('transform', X, **params)
+        return self._route_in_chunks('transform', X, **params)
 
     def predict(self, X, **params):
-        return self._route_to_estimator('predict', X, **params)
+        return self._route_in_chunks('predict', X, **params)
 
     @available_if(_estimator_has('predict_proba'))
     def predict_proba(self, X, **params):
-        return self._route_to_estimator('predict_proba', X, **params)
+        return self._route_in_chunks('predict_proba', X, **params)
 
     @available_if(_estimator_has('predict_log_proba'))
     def predict_log_proba(self, X, **params):
-        return self._route_to_estimator('predict_log_proba', X, **params)
+        return self._route_in_chunks('predict_log_proba', X, **params)
 
     @available_if(_estimator_has('decision_function'))
     def decision_function(self, X, **params):
-        return self._route_to_estimator('decision_function', X, **params)
+        return self._route_in_chunks('decision_function', X, **params)
 
     @available_if(_estimator_has('score'))
+    @_profile_selector_method('score')
     def score(self, X, y, **params):
         return self._route_to_estimator('score', X, y=y, **params)
 
+    def _fit_cached(self, fit, *data):
+        """Call `fit` unless the base estimator with the same parameters was
+        already fitted on the same `data` (given the fit cache is set).
+        """
+        if self.fit_cache is None:
+            return fit()
+        estimator_cls = type(self.base_estimator)
+        key = _fingerprint(
+            type(self).__qualname__,
+            f"{estimator_cls.__module__}.{estimator_cls.__qualname__}",
+            self.base_estimator.get_params(deep=False),
+            *data,
+        )
+        fitted = self.fit_cache.get(key)
+        if fitted is None:
+            fitted = self.fit_cache.set(key, fit())
+        return fitted
+
+    def _route_in_chunks(self, method_name, X, **params):
+        with _profiled(type(self).__name__, self.base_estimator, method_name, X):
+            return self._route_chunks(method_name, X, **params)
+
+    def _route_chunks(self, method_name, X, **params):
+        X_input = X['X'] if isinstance(X, AdaptationOutput) else X
+        n_samples = _num_samples(X_input)
+        if (
+            self.chunk_size is None
+            or n_samples <= self.chunk_size
+            or not getattr(self.base_estimator, '_samplewise_adapt', True)
+        ):
+            return self._route_to_estimator(method_name, X, **params)
+        outputs = [
+            self._route_to_estimator(
+                method_name,
+                _take_chunk(X, batch, n_samples),
+                **{k: _take_chunk(v, batch, n_samples) for k, v in params.items()}
+            )
+            for batch in gen_batches(n_samples, self.chunk_size)
+        ]
+        return _concatenate_chunks(outputs)
+
     def _mark_as_final(self) -> 'BaseSelector':
         """Internal API for keeping track of which estimator is final
         in the Pipeline.
@@ -289,33 +531,47 @@ class BaseSelector(BaseEstimator):
             raise e
         return X_out, routed_params
 
+    def _labeled_samples(self, y):
+        """Internal API to find the samples kept by :meth:`_remove_masked`.
+
+        Returns a slice or integer indices of the samples with non-masked
+        labels, or None when no sample has to be removed.
+        """
+        # If the estimator is not final, we don't need to do anything
+        # If the estimator has a transform method, we don't need to do anything
+        if not self._is_final or hasattr(self, 'transform'):
+            return None
+        return _find_labeled_samples(y)
+
     def _remove_masked(self, X, y, routed_params):
         """Internal API for removing masked samples before passing them
         to the final estimator. Only applicable for the final estimator
         within the Pipeline.
         Exception: if the final estimator has a transform method, we don't
         need to do anything.
-        """
-        # If the estimator is not final, we don't need to do anything
-        # If the estimator has a transform method, we don't need to do anything
-        if not self._is_final or hasattr(self, 'transform'):
-            return X, y, routed_params
 
+        When the labeled samples are contiguous (e.g. sources packed before
+        targets), inputs are sliced without being copied.
+        """
         # in case the estimator is marked as final in the pipeline,
         # the selector is responsible for removing masked labels
         # from the targets
-        y_type = _find_y_type(y)
-        if y_type == 'classification':
-            unmasked_idx = (y != _DEFAULT_MASKED_TARGET_CLASSIFICATION_LABEL)
-        elif y_type == 'continuous':
-            unmasked_idx = np.isfinite(y)
-
-        X = X[unmasked_idx]
-        y = y[unmasked_idx]
+        return self._select_samples(X, y, routed_params, self._labeled_samples(y))
+
+    def _select_samples(self, X, y, routed_params, labeled):
+        """Internal API for keeping the `labeled` samples, as found by
+        :meth:`_labeled_samples` (all the samples when None).
+        """
+        if labeled is None:
+            return X, y, routed_params
+
+        n_samples = len(y)
+        X = X[labeled]
+        y = y[labeled]
         routed_params = {
             # this is somewhat crude way to test is `v` is indexable
-            k: v[unmasked_idx] if (
-                hasattr(v, '__len__') and len(v) == len(unmasked_idx)
+            k: v[labeled] if (
+                hasattr(v, '__len__') and len(v) == n_samples
             ) else v
             for k, v
             in routed_params.items()
@@ -330,28 +586,70 @@ class Shared(BaseSelector):
         check_is_fitted(self)
         return self.base_estimator_
 
+    @_profile_selector_method('fit')
     def fit(self, X, y, **params):
         routing = get_routing_for_object(self.base_estimator)
         X, routed_params = self._route_and_merge_params(routing.fit, X, params)
         X, y, routed_params = self._remove_masked(X, y, routed_params)
-        estimator = clone(self.base_estimator)
-        estimator.fit(X, y, **routed_params)
+
+        def fit():
+            estimator = clone(self.base_estimator)
+            estimator.fit(X, y, **routed_params)
+            return estimator
+
+        estimator = self._fit_cached(fit, X, y, routed_params)
         self.base_estimator_ = estimator
+        self._owns_estimators = self.fit_cache is None
         self.routing_ = get_routing_for_object(estimator)
         return self
 
+    @available_if(_estimator_has('partial_fit'))
+    @_profile_selector_method('partial_fit')
+    def partial_fit(self, X, y=None, **params):
+        """Incrementally fit the base estimator on a batch of samples.
+
+        The base estimator is cloned on the first call and updated in place
+        by the following ones (including after `fit`). The fit cache is not
+        used, estimators taken from it are copied before being updated.
+        When the selector is the final step of a pipeline, batches without
+        labeled samples leave the estimator unchanged.
+        """
+        routing = get_routing_for_object(self.base_estimator)
+        X, routed_params = self._route_and_merge_params(routing.partial_fit, X, params)
+        X, y, routed_params = self._remove_masked(X, y, routed_params)
+        if not hasattr(self, 'base_estimator_'):
+            self.base_estimator_ = clone(self.base_estimator)
+            self.routing_ = get_routing_for_object(self.base_estimator_)
+        elif not getattr(self, '_owns_estimators', True):
+            self.base_estimator_ = deepcopy(self.base_estimator_)
+        self._owns_estimators = True
+        if _num_samples(X) > 0:
+            self.base_estimator_.partial_fit(X, y, **routed_params)
+        return self
+
     # xxx(okachaiev): check if underlying estimator supports 'fit_transform'
     def fit_transform(self, X, y=None, **params):
         self.fit(X, y, **params)
+        return self._adapt(X, params)
+
+    def _partial_fit_transform(self, X, y=None, **params):
+        self.partial_fit(X, y, **params)
+        return self._adapt(X, params, adapt_method='_partial_fit_adapt')
+
+    def _adapt(self, X, params, adapt_method='adapt'):
         routed_params = self.routing_.fit_transform._route_params(params=params)
         # 'fit_transform' allows transformation for source domains
         # as well, that's why it calls 'adapt' directly
         if isinstance(self.base_estimator_, BaseAdapter):
             # xxx(okachaiev): adapt should take 'y' as well, as in many cases
             # we need to bound estimator fitting to a sub-group of the input
-            output = self.base_estimator_.adapt(X, **routed_params)
+            with _profiled('Shared', self.base_estimator, 'adapt', X):
+                output = getattr(self.base_estimator_, adapt_method)(
+                    X, **routed_params
+                )
         else:
-            output = self.base_estimator_.transform(X, **routed_params)
+            with _profiled('Shared', self.base_estimator, 'transform', X):
+                output = self.base_estimator_.transform(X, **routed_params)
         return output
 
     # xxx(okachaiev): fail if unknown domain is given
@@ -367,51 +665,174 @@ class Shared(BaseSelector):
 
 
 class PerDomain(BaseSelector):
+    """Selector that fits a separate clone of the base estimator for each domain.
+
+    Parameters
+    ----------
+    base_estimator : estimator object
+        The estimator to be cloned and fitted on each domain.
+    chunk_size : int, default=None
+        If given, inference methods process the input by chunks of at most
+        `chunk_size` samples, see :class:`~skada.base.BaseSelector`.
+    fit_cache : FitCache, default=None
+        If given, per-domain estimators are stored in the cache and re-used
+        when fitted on the same data again, see :class:`~skada.FitCache`.
+    domain_n_jobs : int, default=None
+        The number of jobs used to fit and to call per-domain estimators
+        concurrently. ``None`` means 1 unless in a
+        :func:`joblib.parallel_config` context, which could also be used
+        to choose the joblib backend. ``-1`` means using all processors.
+        Per-domain inputs are not sliced before dispatching: each job receives
+        the full arrays together with the indices of its domain, so that large
+        inputs are shared (memory-mapped for process-based backends) instead
+        of being copied for each domain. The output ordering does not depend
+        on the number of jobs.
+    **kwargs : dict
+        Parameters of the base estimator.
+    """
+
+    _selector_params = ('chunk_size', 'fit_cache', 'domain_n_jobs')
+
+    def __init__(
+        self,
+        base_estimator: BaseEstimator,
+        chunk_size: Optional[int] = None,
+        fit_cache: Optional[FitCache] = None,
+        domain_n_jobs: Optional[int] = None,
+        **kwargs
+    ):
+        super().__init__(
+            base_estimator,
+            chunk_size=chunk_size,
+            fit_cache=fit_cache,
+            **kwargs
+        )
+        self.domain_n_jobs = domain_n_jobs
 
     def get_estimator(self, domain_label: int) -> BaseEstimator:
         """Provides access to the fitted estimator based on the domain label."""
         check_is_fitted(self)
         return self.estimators_[domain_label]
 
+    @_profile_selector_method('fit')
     def fit(self, X, y, **params):
         # xxx(okachaiev): use check_*_domain to derive default domain labels
         sample_domain = params['sample_domain']
         routing = get_routing_for_object(self.base_estimator)
         X, routed_params = self._route_and_merge_params(routing.fit, X, params)
-        X, y, routed_params = self._remove_masked(X, y, routed_params)
-        estimators = {}
-        for domain_label in np.unique(sample_domain):
-            idx, = np.where(sample_domain == domain_label)
-            estimator = clone(self.base_estimator)
-            estimator.fit(
-                X[idx],
-                y[idx] if y is not None else None,
-                **{k: v[idx] for k, v in routed_params.items()}
+        labeled = self._labeled_samples(y)
+        if labeled is not None:
+            # domains of the samples that are left after masking
+            sample_domain = np.asarray(sample_domain)[labeled]
+        X, y, routed_params = self._select_samples(X, y, routed_params, labeled)
+
+        def fit():
+            domain_index = get_domain_index(sample_domain)
+            tasks = (
+                (domain_label, clone(self.base_estimator), idx)
+                for domain_label, idx in domain_index.groups()
             )
-            estimators[domain_label] = estimator
-        self.estimators_ = estimators
+            if self._is_parallel(len(domain_index.domains)):
+                fitted = Parallel(n_jobs=self.domain_n_jobs)(
+                    delayed(_fit_domain)(
+                        estimator, X, y, idx, routed_params, domain_label
+                    )
+                    for domain_label, estimator, idx in tasks
+                )
+            else:
+                fitted = [
+                    _fit_domain(estimator, X, y, idx, routed_params, domain_label)
+                    for domain_label, estimator, idx in tasks
+                ]
+            return dict(zip(domain_index.domains, fitted))
+
+        self.estimators_ = self._fit_cached(
+            fit, X, y, np.asarray(sample_domain), routed_params
+        )
+        self._owns_estimators = self.fit_cache is None
         self.routing_ = routing
         return self
 
+    @available_if(_estimator_has('partial_fit'))
+    @_profile_selector_method('partial_fit')
+    def partial_fit(self, X, y=None, **params):
+        """Incrementally fit per-domain estimators on a batch of samples.
+
+        Estimators are cloned for the domains seen for the first time and
+        updated in place for the others (including after `fit`). The fit
+        cache is not used, estimators taken from it are copied before being
+        updated.
+        """
+        # xxx(okachaiev): use check_*_domain to derive default domain labels
+        sample_domain = params['sample_domain']
+        routing = get_routing_for_object(self.base_estimator)
+        X, routed_params = self._route_and_merge_params(routing.partial_fit, X, params)
+        labeled = self._labeled_samples(y)
+        if labeled is not None:
+            sample_domain = np.asarray(sample_domain)[labeled]
+        X, y, routed_params = self._select_samples(X, y, routed_params, labeled)
+
+        if not hasattr(self, 'estimators_'):
+            self.estimators_ = {}
+            self.routing_ = routing
+        elif not getattr(self, '_owns_estimators', True):
+            self.estimators_ = deepcopy(self.estimators_)
+        self._owns_estimators = True
+        domain_index = get_domain_index(sample_domain)
+        tasks = [
+            (
+                domain_label,
+                self.estimators_[domain_label]
+                if domain_label in self.estimators_
+                else clone(self.base_estimator),
+                idx
+            )
+            for domain_label, idx in domain_index.groups()
+        ]
+        if self._is_parallel(len(tasks)):
+            fitted = Parallel(n_jobs=self.domain_n_jobs)(
+                delayed(_call_domain)(
+                    estimator, 'partial_fit', X, y, idx, routed_params, domain_label
+                )
+                for domain_label, estimator, idx in tasks
+            )
+        else:
+            fitted = [
+                _call_domain(
+                    estimator, 'partial_fit', X, y, idx, routed_params, domain_label
+                )
+                for domain_label, estimator, idx in tasks
+            ]
+        self.estimators_.update(zip(domain_index.domains, fitted))
+        return self
+
     def _route_to_estimator(self, method_name, X, y=None, **params):
         check_is_fitted(self)
         request = getattr(self.routing_, method_name)
         X, routed_params = self._route_and_merge_params(request, X, params)
         # xxx(okachaiev): use check_*_domain to derive default domain labels
         sample_domain = params['sample_domain']
+        # xxx(okachaiev): fail if unknown domain is given
+        tasks = [
+            (domain_label, self.estimators_[domain_label], idx)
+            for domain_label, idx in get_domain_index(sample_domain).groups()
+        ]
+        if self._is_parallel(len(tasks)):
+            outputs = Parallel(n_jobs=self.domain_n_jobs)(
+                delayed(_call_domain)(
+                    estimator, method_name, X, y, idx, routed_params, domain_label
+                )
+                for domain_label, estimator, idx in tasks
+            )
+        else:
+            outputs = [
+                _call_domain(
+                    estimator, method_name, X, y, idx, routed_params, domain_label
+                )
+                for domain_label, estimator, idx in tasks
+            ]
         output = None
-        # xxx(okachaiev): maybe return_index?
-        for domain_label in np.unique(sample_domain):
-            # xxx(okachaiev): fail if unknown domain is given
-            method = getattr(self.estimators_[domain_label], method_name)
-            idx, = np.where(sample_domain == domain_label)
-            X_domain = X[idx]
-            y_domain = y[idx] if y is not None else None
-            domain_params = {k: v[idx] for k, v in routed_params.items()}
-            if y is None:
-                domain_output = method(X_domain, **domain_params)
-            else:
-                domain_output = method(X_domain, y_domain, **domain_params)
+        for (_, _, idx), domain_output in zip(tasks, outputs):
             if output is None:
                 output = np.zeros(
                     (X.shape[0], *domain_output.shape[1:]),
@@ -419,3 +840,84 @@ class PerDomain(BaseSelector):
                 )
             output[idx] = domain_output
         return output
+
+    def _is_parallel(self, n_domains: int) -> bool:
+        return n_domains > 1 and effective_n_jobs(self.domain_n_jobs) != 1
+
+
+def _fit_domain(estimator, X, y, idx, routed_params, domain_label=None):
+    """Fit the estimator on the samples of a single domain given by `idx`."""
+    X_domain = X[idx]
+    with _profiled('PerDomain', estimator, 'fit', X_domain, domain_label):
+        estimator.fit(
+            X_domain,
+            y[idx] if y is not None else None,
+            **{k: v[idx] for k, v in routed_params.items()}
+        )
+    return estimator
+
+
+def _call_domain(estimator, method_name, X, y, idx, routed_params, domain_label=None):
+    """Call `method_name` of the estimator on the samples of a single domain."""
+    method = getattr(estimator, method_name)
+    X_domain = X[idx]
+    domain_params = {k: v[idx] for k, v in routed_params.items()}
+    with _profiled('PerDomain', estimator, method_name, X_domain, domain_label):
+        if y is None:
+            return method(X_domain, **domain_params)
+        return method(X_domain, y[idx], **domain_params)
+
+
+def _take_chunk(value, batch, n_samples):
+    """Select the rows of the chunk for per-sample arrays (and adaptation
+    outputs), other values are given to each chunk as they are.
+    """
+    if isinstance(value, AdaptationOutput):
+        return AdaptationOutput(**{
+            k: _take_chunk(v, batch, n_samples) for k, v in value.items()
+        })
+    # this is somewhat crude way to test is `value` is indexable
+    if hasattr(value, '__len__') and len(value) == n_samples:
+        return value[batch]
+    return value
+
+
+def _concatenate_chunks(outputs):
+    first = outputs[0]
+    if isinstance(first, AdaptationOutput):
+        return AdaptationOutput(**{
+            k: _concatenate_adaptation_outputs(outputs, k) for k in first
+        })
+    if sparse.issparse(first):
+        return sparse.vstack(outputs, format=first.format)
+    return np.concatenate(outputs)
+
+
+def _concatenate_adaptation_outputs(outputs, key):
+    values = [output[key] for output in outputs]
+    given = [value for value in values if value is not None]
+    if not given:
+        return None
+    if all(isinstance(value, SourceSampleWeight) for value in given):
+        # keep compact weights compact
+        indices, offset = [], 0
+        for output, value in zip(outputs, values):
+            if value is not None:
+                indices.append(value.indices + offset)
+            offset += _num_samples(output['X'])
+        return SourceSampleWeight(
+            np.concatenate(indices),
+            np.concatenate([value.values for value in given]),
+            n_samples=offset,
+        )
+    if len(given) < len(values):
+        # e.g. weights are not given for the chunks without source samples,
+        # which is the same as zero weights for the whole input
+        values = [
+            np.zeros(
+                (_num_samples(output['X']), *given[0].shape[1:]),
+                dtype=given[0].dtype
+            ) if value is None else value
+            for output, value in zip(outputs, values)
+        ]
+    return _concatenate_chunks(values)
@@ -171,11 +171,18 @@ class DomainAwareDataset:
                 and target domain label is always < 0.
             domain_names : dict
                 The names of domains and associated domain labels.
+            domain_offsets : dict
+                The domain labels and associated ``(start, stop)`` range
+                of rows. Rows are grouped by domain, with all sources
+                stored before all targets, so that
+                :func:`~skada.utils.source_target_split` could return
+                views instead of copies (see its `copy` parameter).
 
         (X, y, sample_domain) : tuple if `return_X_y=True`
             Tuple of (data, target, sample_domain), see the description above.
         """
         Xs, ys, sample_domains = [], [], []
+        domain_offsets, offset = {}, 0
         domain_labels = {}
         if as_sources is None:
             as_sources = []
@@ -196,6 +203,8 @@ class DomainAwareDataset:
             ys.append(y)
             sample_domains.append(np.ones_like(y)*domain_id)
             domain_labels[domain_name] = domain_id
+            domain_offsets[domain_id] = (offset, offset + X.shape[0])
+            offset += X.shape[0]
         # xxx(okachaiev): code duplication, re-write when API is fixed
         dtype = None
         for domain_name in as_targets:
@@ -226,6 +235,8 @@ class DomainAwareDataset:
             ys.append(y)
             sample_domains.append(-1 * domain_id * np.ones_like(y))
             domain_labels[domain_name] = -1 * domain_id
+            domain_offsets[-1 * domain_id] = (offset, offset + X.shape[0])
+            offset += X.shape[0]
 
         # xxx(okachaiev): so far this only works if source and target has the same size
         Xs = np.concatenate(Xs)
@@ -236,6 +247,7 @@ class DomainAwareDataset:
             y=ys,
             sample_domain=sample_domain,
             domain_names=domain_labels,
+            domain_offsets=domain_offsets,
         )
 
     def pack_train(
@@ -61,3 +61,18 @@ def test_dataset_repr():
         "DomainAwareDataset(domains=['s1', 's2', 't1', 't2', 's3', ...])\n"
         "Number of domains: 6\nTotal size: 17"
         )
+
+
+def test_dataset_pack_domain_offsets():
+    dataset = DomainAwareDataset()
+    dataset.add_domain(np.array([[1.], [2.]]), np.array([1, 2]), 's1')
+    dataset.add_domain(np.array([[3.], [4.], [5.]]), np.array([1, 2, 3]), 't1')
+    dataset.add_domain(np.array([[6.]]), np.array([1]), 's2')
+    data = dataset.pack(
+        as_sources=['s1', 's2'],
+        as_targets=['t1'],
+        return_X_y=False
+    )
+    assert data.domain_offsets == {1: (0, 2), 3: (2, 3), -2: (3, 6)}
+    for domain_label, (start, stop) in data.domain_offsets.items():
+        assert np.all(data.sample_domain[start:stop] == domain_label)
@@ -4,7 +4,9 @@
 
 import numpy as np
 
-from skada.base import BaseAdapter, DAEstimator
+from skada.base import BaseAdapter, DAEstimator, SourceSampleWeight
+
+import pytest
 
 
 def test_BaseAdapter():
@@ -30,3 +32,33 @@ def test_DAEstimator():
     # set one attribute to shohat something fitted
     cls.something_ = 1
     cls.predict(X=X, sample_domain=None)
+
+
+def test_SourceSampleWeight():
+    dense = np.array([0., 0.5, 0., 0., 2., 1.5])
+    weights = SourceSampleWeight([5, 1, 4], [1.5, 0.5, 2.], n_samples=6)
+    assert len(weights) == 6
+    assert weights.shape == (6,)
+    assert weights.dtype == np.float64
+    np.testing.assert_array_equal(np.asarray(weights), dense)
+    np.testing.assert_array_equal(weights.toarray(), dense)
+
+    # indexing only materializes the selected samples
+    for key in [slice(None), slice(1, 5), slice(None, None, -2),
+                dense > 0, dense == 0, np.array([0, 4, -1])]:
+        np.testing.assert_array_equal(weights[key], dense[key])
+    assert weights[4] == 2. and weights[-1] == 1.5 and weights[0] == 0.
+    np.testing.assert_array_equal(weights[[1, 4, 5]], [0.5, 2., 1.5])
+
+    # numpy operations work on the dense array
+    np.testing.assert_array_equal(weights * 2, dense * 2)
+    np.testing.assert_array_equal(weights > 1, dense > 1)
+    assert np.sum(weights) == dense.sum()
+
+    # the dense array keeps the dtype of the weights
+    weights32 = SourceSampleWeight([1, 4], np.float32([0.5, 2.]), n_samples=6)
+    assert np.asarray(weights32).dtype == np.float32
+    assert np.asarray(weights32, dtype=np.float64).dtype == np.float64
+
+    with pytest.raises(ValueError):
+        SourceSampleWeight([0, 1], [1.], n_samples=3)
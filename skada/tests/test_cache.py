@@ -0,0 +1,184 @@
+# License: BSD 3-Clause
+
+import pickle
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from skada import (
+    CORALAdapter,
+    FitCache,
+    GaussianReweightDensityAdapter,
+    PerDomain,
+    TransferComponentAnalysisAdapter,
+    clear_covariance_cache,
+    covariance_cache_info,
+    make_da_pipeline,
+    set_covariance_cache_size,
+)
+from skada._cache import _ArrayCache, _fingerprint
+
+import pytest
+
+
+def test_fit_cache_reuses_adapter(da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    cache = FitCache()
+    pipe = make_da_pipeline(
+        TransferComponentAnalysisAdapter(n_components=2),
+        LogisticRegression(),
+        fit_cache=cache,
+    )
+    pipe.fit(X, y, sample_domain=sample_domain)
+    adapter = pipe[0].base_estimator_
+    assert cache.cache_info() == (0, 2, 32, 2)
+
+    # only the downstream estimator is fitted again
+    for C in [0.1, 10.]:
+        pipe = clone(pipe).set_params(logisticregression__C=C)
+        assert pipe[0].fit_cache is cache
+        pipe.fit(X, y, sample_domain=sample_domain)
+        assert pipe[0].base_estimator_ is adapter
+        assert pipe[1].base_estimator_.C == C
+    assert cache.cache_info() == (2, 4, 32, 4)
+
+    # same parameters, same data
+    pipe.fit(X, y, sample_domain=sample_domain)
+    assert cache.cache_info().hits == 4
+
+    # changes of the adapter parameters or the data are not cached
+    pipe.set_params(transfercomponentanalysisadapter__mu=1.)
+    pipe.fit(X, y, sample_domain=sample_domain)
+    assert pipe[0].base_estimator_ is not adapter
+    X_shifted = X + 1
+    pipe.fit(X_shifted, y, sample_domain=sample_domain)
+    assert cache.cache_info().misses == 8
+
+    cache.cache_clear()
+    assert cache.cache_info() == (0, 0, 32, 0)
+
+
+def test_fit_cache_per_domain():
+    X = np.array([[1., 0.], [0., 8.], [3., 0.], [0., 0.]])
+    cache = FitCache()
+    scaler = PerDomain(StandardScaler(), fit_cache=cache)
+    scaler.fit(X, None, sample_domain=np.array([1, 2, 1, 2]))
+    estimators = scaler.estimators_
+    scaler.fit(X, None, sample_domain=np.array([1, 2, 1, 2]))
+    assert scaler.estimators_ is estimators
+    # same data split into different domains
+    scaler.fit(X, None, sample_domain=np.array([1, 1, 2, 2]))
+    assert scaler.estimators_ is not estimators
+    assert cache.cache_info()[:2] == (1, 2)
+
+
+def test_fit_cache_maxsize():
+    cache = FitCache(maxsize=2)
+    for key in 'abc':
+        cache.set(key, key.upper())
+    assert len(cache) == 2
+    assert cache.get('a') is None
+    assert cache.get('c') == 'C'
+    # least recently used entry is dropped first
+    cache.get('b')
+    cache.set('d', 'D')
+    assert cache.get('c') is None
+    assert cache.get('b') == 'B'
+
+
+def test_fit_cache_pickle():
+    cache = FitCache(maxsize=4)
+    cache.set('a', 'A')
+    restored = pickle.loads(pickle.dumps(cache))
+    assert restored.maxsize == 4
+    assert len(restored) == 0
+
+
+def test_array_cache():
+    cache = _ArrayCache(maxbytes=64)
+    value = cache.set('a', (np.zeros(4), np.zeros(2)))
+    assert not value[0].flags.writeable
+    cache.set('b', (np.ones(2),))
+    assert cache.cache_info().currsize == 64
+    # least recently used entries are dropped first
+    cache.get('a')
+    cache.set('c', (np.ones(2),))
+    assert cache.get('b') is None
+    assert cache.get('a') is value
+    # values larger than the cache are not stored, nor frozen
+    large = cache.set('d', (np.zeros(9),))
+    assert cache.get('d') is None
+    assert large[0].flags.writeable
+    cache.cache_clear()
+    assert cache.cache_info() == (0, 0, 64, 0)
+
+
+def test_covariance_cache(da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    clear_covariance_cache()
+    coral = CORALAdapter().fit(X, y, sample_domain=sample_domain)
+    # covariances and eigendecompositions are re-used by the copies
+    coral_copy = clone(coral).fit(X, y, sample_domain=sample_domain)
+    assert covariance_cache_info().hits == 4
+    np.testing.assert_array_equal(
+        coral.cov_source_inv_sqrt_, coral_copy.cov_source_inv_sqrt_
+    )
+
+    # and by the other adapters fitted on the same samples
+    reweight = GaussianReweightDensityAdapter()
+    reweight.fit(X, y, sample_domain=sample_domain)
+    assert covariance_cache_info().hits == 6
+    assert not reweight.cov_source_.flags.writeable
+    reweight.adapt(X, sample_domain=sample_domain)
+    assert covariance_cache_info().hits == 8
+    clear_covariance_cache()
+    assert covariance_cache_info() == (0, 0, 256 * 2 ** 20, 0)
+
+
+@pytest.mark.parametrize(
+    'adapter', [CORALAdapter(), GaussianReweightDensityAdapter()]
+)
+def test_covariance_cache_skips_streamed_statistics(adapter, da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    clear_covariance_cache()
+    order = np.random.default_rng(0).permutation(X.shape[0])
+    for chunk in np.array_split(order, 4):
+        adapter.partial_fit(X[chunk], y[chunk], sample_domain=sample_domain[chunk])
+        adapter.adapt(X, sample_domain=sample_domain)
+    assert covariance_cache_info() == (0, 0, 256 * 2 ** 20, 0)
+
+
+def test_covariance_cache_size(da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    clear_covariance_cache()
+    try:
+        CORALAdapter().fit(X, y, sample_domain=sample_domain)
+        assert covariance_cache_info().currsize > 0
+        # shrinking the cache drops the entries which do not fit anymore
+        set_covariance_cache_size(0)
+        assert covariance_cache_info().currsize == 0
+        CORALAdapter().fit(X, y, sample_domain=sample_domain)
+        assert covariance_cache_info().currsize == 0
+        with pytest.raises(ValueError):
+            set_covariance_cache_size(-1)
+    finally:
+        set_covariance_cache_size(256 * 2 ** 20)
+        clear_covariance_cache()
+
+
+@pytest.mark.parametrize(
+    'left, right',
+    [
+        (np.arange(4), np.arange(4).astype(np.float64)),
+        (np.arange(4), np.arange(4).reshape(2, 2)),
+        ({'a': np.zeros(2)}, {'b': np.zeros(2)}),
+        (np.ones(3), None),
+    ]
+)
+def test_fingerprint(left, right):
+    assert _fingerprint(left) == _fingerprint(left)
+    assert _fingerprint(left) != _fingerprint(right)
+    # views are hashed by value
+    assert _fingerprint(np.arange(6)[::2]) == _fingerprint(np.array([0, 2, 4]))
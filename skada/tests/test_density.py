@@ -0,0 +1,59 @@
+# License: BSD 3-Clause
+
+import numpy as np
+from sklearn.neighbors import KernelDensity
+
+from skada import ApproximateKernelDensity, ReweightDensityAdapter
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    'n_features, params',
+    [
+        (1, dict(method='binned')),
+        (2, dict(method='binned')),
+        (3, dict(method='binned', n_bins=64)),
+        (5, dict(method='landmarks', n_landmarks=250)),
+    ]
+)
+def test_approximate_kernel_density(n_features, params):
+    rng = np.random.RandomState(0)
+    X = rng.randn(1000, n_features)
+    X_test = rng.randn(50, n_features) + 0.5
+    expected = KernelDensity(bandwidth=0.5).fit(X).score_samples(X_test)
+    kde = ApproximateKernelDensity(bandwidth=0.5, random_state=0, **params)
+    log_density = kde.fit(X).score_samples(X_test)
+    assert kde.method_ == params['method']
+    assert np.median(np.abs(log_density - expected)) < 0.1
+    assert kde.score(X_test) == pytest.approx(log_density.sum())
+
+
+def test_approximate_kernel_density_exact_landmarks():
+    rng = np.random.RandomState(0)
+    X = rng.randn(50, 4)
+    kde = ApproximateKernelDensity(bandwidth='scott', n_landmarks=50).fit(X)
+    expected = KernelDensity(bandwidth='scott').fit(X)
+    # as many landmarks as samples
+    assert kde.method_ == 'landmarks'
+    assert kde.bandwidth_ == pytest.approx(expected.bandwidth_)
+    np.testing.assert_allclose(kde.score_samples(X), expected.score_samples(X))
+
+    with pytest.raises(ValueError, match='at most 3 features'):
+        ApproximateKernelDensity(method='binned').fit(X)
+
+
+def test_reweight_approximate_density(da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    source = sample_domain >= 0
+    weights = {}
+    for name, estimator in [
+        ('exact', KernelDensity()),
+        ('approximate', ApproximateKernelDensity()),
+    ]:
+        adapter = ReweightDensityAdapter(weight_estimator=estimator)
+        output = adapter.fit_transform(X, y, sample_domain=sample_domain)
+        weights[name] = output['sample_weight'][source]
+    np.testing.assert_allclose(
+        weights['approximate'], weights['exact'], rtol=0.05, atol=1e-5
+    )
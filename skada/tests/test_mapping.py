@@ -4,7 +4,13 @@
 #
 # License: BSD 3-Clause
 
+import pickle
+from unittest import mock
+
 import numpy as np
+from scipy import sparse
+from sklearn.base import clone
+from sklearn.exceptions import NotFittedError
 from sklearn.linear_model import LogisticRegression
 
 from skada.datasets import DomainAwareDataset
@@ -15,6 +21,9 @@ from skada import (
     ClassRegularizerOTMapping,
     EntropicOTMappingAdapter,
     EntropicOTMapping,
+    FitCache,
+    FactoredOTMappingAdapter,
+    FactoredOTMapping,
     LinearOTMappingAdapter,
     LinearOTMapping,
     OTMappingAdapter,
@@ -30,6 +39,10 @@ import pytest
         make_da_pipeline(OTMappingAdapter(), LogisticRegression()),
         OTMapping(),
         make_da_pipeline(EntropicOTMappingAdapter(), LogisticRegression()),
+        make_da_pipeline(
+            EntropicOTMappingAdapter(method='sinkhorn_log'),
+            LogisticRegression()
+        ),
         EntropicOTMapping(),
         make_da_pipeline(
             ClassRegularizerOTMappingAdapter(norm="lpl1"),
@@ -43,12 +56,20 @@ import pytest
         ClassRegularizerOTMapping(norm="l1l2"),
         make_da_pipeline(LinearOTMappingAdapter(), LogisticRegression()),
         LinearOTMapping(),
+        make_da_pipeline(
+            FactoredOTMappingAdapter(n_anchors=10, random_state=0),
+            LogisticRegression()
+        ),
+        FactoredOTMapping(random_state=0),
         make_da_pipeline(CORALAdapter(), LogisticRegression()),
         pytest.param(
             CORALAdapter(reg=None),
             marks=pytest.mark.xfail(reason='Fails without regularization')
         ),
         make_da_pipeline(CORALAdapter(reg=0.1), LogisticRegression()),
+        make_da_pipeline(
+            CORALAdapter(n_components=1, random_state=0), LogisticRegression()
+        ),
         CORAL(),
     ]
 )
@@ -75,3 +96,285 @@ def test_mapping_estimator(estimator, tmp_da_dataset):
     assert np.mean(y_pred == y_test) > 0.9
     score = estimator.score(X_test, y_test, sample_domain=sample_domain)
     assert score > 0.9
+
+
+@pytest.mark.parametrize(
+    "adapter", [
+        OTMappingAdapter(),
+        EntropicOTMappingAdapter(),
+        ClassRegularizerOTMappingAdapter(),
+        LinearOTMappingAdapter(),
+        FactoredOTMappingAdapter(n_anchors=10, random_state=0),
+        CORALAdapter(),
+        CORALAdapter(reg=0.1),
+        CORALAdapter(n_components=1, random_state=0),
+    ]
+)
+def test_mapping_preserves_float32(adapter, da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+
+    X_adapt = adapter.fit_transform(X, y, sample_domain=sample_domain)
+    X32_adapt = adapter.fit_transform(
+        X.astype(np.float32), y, sample_domain=sample_domain
+    )
+    assert X_adapt.dtype == np.float64
+    assert X32_adapt.dtype == np.float32
+    np.testing.assert_allclose(X32_adapt, X_adapt, rtol=1e-4, atol=1e-4)
+
+
+@pytest.mark.parametrize("reg", ['auto', 0.1, None])
+def test_coral_partial_fit(reg, da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    adapter = CORALAdapter(reg=reg).fit(X, y, sample_domain=sample_domain)
+
+    # chunks of a single domain, the source ones first
+    streamed = CORALAdapter(reg=reg)
+    with mock.patch('skada._mapping._invsqrtm') as invsqrtm:
+        for chunk in np.array_split(np.arange(X.shape[0]), 5):
+            streamed.partial_fit(
+                X[chunk], y[chunk], sample_domain=sample_domain[chunk]
+            )
+    # only the statistics are updated, the parameters are computed on adapt
+    invsqrtm.assert_not_called()
+    assert not hasattr(streamed, 'cov_source_inv_sqrt_')
+    np.testing.assert_allclose(
+        streamed.transform(X, sample_domain=sample_domain, allow_source=True),
+        adapter.transform(X, sample_domain=sample_domain, allow_source=True),
+        atol=1e-8,
+    )
+    np.testing.assert_allclose(
+        streamed.cov_source_inv_sqrt_, adapter.cov_source_inv_sqrt_, atol=1e-10
+    )
+    np.testing.assert_allclose(
+        streamed.cov_target_sqrt_, adapter.cov_target_sqrt_, atol=1e-10
+    )
+
+    # parameters are only derived from both source and target statistics
+    streamed = CORALAdapter(reg=reg)
+    source = sample_domain >= 0
+    streamed.partial_fit(X[source], y[source], sample_domain=sample_domain[source])
+    with pytest.raises(NotFittedError):
+        streamed.transform(X, sample_domain=sample_domain, allow_source=True)
+
+
+def test_coral_low_rank(da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+
+    # with all the components, same as the full covariances
+    adapter = CORALAdapter(reg=0.1, n_components=X.shape[1], random_state=0)
+    np.testing.assert_allclose(
+        adapter.fit_transform(X, y, sample_domain=sample_domain),
+        CORALAdapter(reg=0.1).fit_transform(X, y, sample_domain=sample_domain),
+    )
+    assert not hasattr(adapter, 'cov_source_inv_sqrt_')
+    assert not hasattr(adapter, 'partial_fit')
+
+    # data with a few directions of large variance in high dimension
+    rng = np.random.RandomState(0)
+    factors = rng.randn(3, 50) * 5
+    X = np.concatenate([
+        rng.randn(200, 3) @ factors + rng.randn(200, 50),
+        rng.randn(200, 3) @ factors[::-1] * 2 + rng.randn(200, 50),
+    ])
+    sample_domain = np.repeat([1, -2], 200)
+    adapter = CORALAdapter(reg=0.1, n_components=3, random_state=0)
+    X_adapt = adapter.fit_transform(X, sample_domain=sample_domain)
+    expected = CORALAdapter(reg=0.1).fit_transform(X, sample_domain=sample_domain)
+    source = sample_domain >= 0
+    error = np.linalg.norm(X_adapt[source] - expected[source])
+    assert error < 0.1 * np.linalg.norm(expected[source])
+
+
+@pytest.mark.parametrize(
+    "adapter_cls", [OTMappingAdapter, EntropicOTMappingAdapter]
+)
+def test_mapping_minibatch(adapter_cls, da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    source = sample_domain >= 0
+    X_adapt = adapter_cls().fit_transform(X, y, sample_domain=sample_domain)
+
+    # a single batch with all the samples solves the full OT problem
+    adapter = adapter_cls(batch_size=X.shape[0], random_state=0)
+    np.testing.assert_allclose(
+        adapter.fit_transform(X, y, sample_domain=sample_domain), X_adapt, atol=1e-6
+    )
+
+    adapter = adapter_cls(batch_size=16, n_batches=40, random_state=0)
+    X_batch_adapt = adapter.fit_transform(X, y, sample_domain=sample_domain)
+    assert X_batch_adapt.shape == X.shape
+    np.testing.assert_array_equal(X_batch_adapt[~source], X[~source])
+    # parallel jobs give the same mapping
+    adapter.set_params(n_jobs=2)
+    np.testing.assert_allclose(
+        adapter.fit_transform(X, y, sample_domain=sample_domain), X_batch_adapt
+    )
+    # samples unseen during fit are moved as their nearest source sample
+    X_new = X[source][:5] + 1e-3
+    np.testing.assert_allclose(
+        adapter.adapt(X_new, sample_domain=sample_domain[source][:5]),
+        X_batch_adapt[source][:5] + 1e-3,
+    )
+
+    # fewer batches than needed to visit all the source samples
+    adapter = adapter_cls(batch_size=4, n_batches=2, random_state=0)
+    X_batch_adapt = adapter.fit_transform(X, y, sample_domain=sample_domain)
+    assert np.all(np.isfinite(X_batch_adapt))
+
+
+@pytest.mark.parametrize(
+    "adapter", [
+        OTMappingAdapter(),
+        OTMappingAdapter(batch_size=16, random_state=0),
+        EntropicOTMappingAdapter(),
+        EntropicOTMappingAdapter(block_size=16),
+        ClassRegularizerOTMappingAdapter(),
+        LinearOTMappingAdapter(),
+    ]
+)
+def test_mapping_out_of_sample(adapter, da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    adapter.fit(X, y, sample_domain=sample_domain)
+    source = sample_domain >= 0
+    X_new = X[source][:10] + 0.05
+
+    # same mapping as the one of the POT transport
+    for X_source in [X[source], X_new]:
+        np.testing.assert_allclose(
+            adapter.adapt(X_source, sample_domain=np.ones(X_source.shape[0])),
+            adapter.ot_transport_.transform(Xs=X_source),
+        )
+    assert hasattr(adapter, 'nn_index_') != isinstance(adapter, LinearOTMappingAdapter)
+
+
+def test_mapping_sparse_coupling(da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    source = sample_domain >= 0
+    dense = OTMappingAdapter().fit(X, y, sample_domain=sample_domain)
+    adapter = OTMappingAdapter(sparse_coupling=True)
+    adapter.fit(X, y, sample_domain=sample_domain)
+
+    coupling = adapter.ot_transport_.coupling_
+    assert sparse.isspmatrix_csr(coupling)
+    assert coupling.nnz <= X.shape[0] - 1
+    np.testing.assert_allclose(coupling.toarray(), dense.ot_transport_.coupling_)
+    assert adapter.ot_transport_.cost_ is None
+    assert len(pickle.dumps(adapter)) < len(pickle.dumps(dense))
+
+    # same mapping for fitted and unseen source samples
+    X_new = X[source][:10] + 0.05
+    for X_source in [X[source], X_new]:
+        np.testing.assert_allclose(
+            adapter.adapt(X_source, sample_domain=np.ones(X_source.shape[0])),
+            dense.adapt(X_source, sample_domain=np.ones(X_source.shape[0])),
+        )
+
+
+def test_entropic_mapping_warm_start():
+    rng = np.random.RandomState(0)
+    X = np.concatenate([rng.randn(100, 2), rng.randn(100, 2) + 2])
+    y = np.concatenate([rng.randint(2, size=100), -np.ones(100, dtype=int)])
+    sample_domain = np.concatenate([np.ones(100), -np.ones(100)]).astype(int)
+    cache = FitCache()
+    adapter = EntropicOTMappingAdapter(norm='max', potentials_cache=cache)
+    n_iter = {}
+    for reg_e in [0.1, 0.02, 0.005]:
+        warm = clone(adapter).set_params(reg_e=reg_e)
+        warm.fit(X, y, sample_domain=sample_domain)
+        cold = EntropicOTMappingAdapter(norm='max', reg_e=reg_e)
+        cold.fit(X, y, sample_domain=sample_domain)
+        n_iter[reg_e] = (
+            warm.ot_transport_.log_['niter'], cold.ot_transport_.log_['niter']
+        )
+        np.testing.assert_allclose(
+            warm.mapped_source_, cold.mapped_source_, atol=1e-3
+        )
+    # potentials of the previous fit on the same data are reused
+    assert len(cache) == 1
+    assert n_iter[0.1][0] == n_iter[0.1][1]
+    assert n_iter[0.005][0] < n_iter[0.005][1]
+
+
+@pytest.mark.parametrize('norm', [None, 'max', 'log'])
+def test_entropic_mapping_blocked(norm, da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    source = sample_domain >= 0
+    reference = EntropicOTMappingAdapter(norm=norm, method='sinkhorn_log')
+    reference.fit(X, y, sample_domain=sample_domain)
+    adapter = EntropicOTMappingAdapter(norm=norm, block_size=32)
+    adapter.fit(X, y, sample_domain=sample_domain)
+
+    # no dense matrix is kept
+    assert not hasattr(adapter.ot_transport_, 'coupling_')
+    assert not hasattr(adapter.ot_transport_, 'cost_')
+    X_new = X[source][:10] + 0.05
+    for X_source in [X[source], X_new]:
+        np.testing.assert_allclose(
+            adapter.adapt(X_source, sample_domain=np.ones(X_source.shape[0])),
+            reference.adapt(X_source, sample_domain=np.ones(X_source.shape[0])),
+            atol=1e-5,
+        )
+
+    with pytest.raises(ValueError, match='metric'):
+        adapter.set_params(metric='euclidean').fit(
+            X, y, sample_domain=sample_domain
+        )
+
+
+@pytest.mark.parametrize(
+    'adapter_cls', [OTMappingAdapter, EntropicOTMappingAdapter]
+)
+def test_mapping_per_source_domain(adapter_cls):
+    rng = np.random.RandomState(0)
+    X = rng.randn(90, 2) + np.repeat([[0, 0], [3, 0], [0, 3]], 30, axis=0)
+    y = np.concatenate([rng.randint(2, size=60), -np.ones(30, dtype=int)])
+    sample_domain = np.repeat([1, 2, -3], 30)
+    adapter = adapter_cls(per_source_domain=True, n_jobs=2)
+    X_adapt = adapter.fit_transform(X, y, sample_domain=sample_domain)
+    assert sorted(adapter.domain_adapters_) == [1, 2]
+
+    # each source domain is mapped with its own plan
+    for domain in [1, 2]:
+        mask = (sample_domain == domain) | (sample_domain < 0)
+        expected = adapter_cls().fit_transform(
+            X[mask], y[mask], sample_domain=sample_domain[mask]
+        )
+        np.testing.assert_allclose(X_adapt[mask], expected)
+
+    X_new = X[:10] + 0.05
+    np.testing.assert_allclose(
+        adapter.adapt(X_new, sample_domain=np.full(10, 2)),
+        adapter.domain_adapters_[2].adapt(X_new, sample_domain=np.full(10, 2)),
+    )
+    with pytest.raises(ValueError, match='Unknown source domain'):
+        adapter.adapt(X_new, sample_domain=np.full(10, 4))
+
+
+def test_factored_mapping(da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    source = sample_domain >= 0
+    adapter = FactoredOTMappingAdapter(n_anchors=5, random_state=0)
+    X_adapt = adapter.fit_transform(X, y, sample_domain=sample_domain)
+
+    transport = adapter.ot_transport_
+    assert transport.coupling_.shape == (5, 5)
+    np.testing.assert_allclose(transport.coupling_.sum(), 1.)
+    # samples assigned to the same anchor are moved together
+    anchors = transport.source_kmeans_.labels_
+    np.testing.assert_allclose(
+        X_adapt[source] - X[source],
+        (transport.mapped_xs_ - transport.xs_)[anchors],
+    )
+    np.testing.assert_array_equal(X_adapt[~source], X[~source])
+    # unseen source samples are moved by the displacement of their anchor
+    X_new = X[source][:3] + 1e-3
+    np.testing.assert_allclose(
+        adapter.adapt(X_new, sample_domain=np.ones(3)),
+        X_adapt[source][:3] + 1e-3,
+    )
+
+    # there are no more anchors than samples
+    adapter = FactoredOTMappingAdapter(n_anchors=1000, random_state=0)
+    adapter.fit(X, y, sample_domain=sample_domain)
+    assert adapter.ot_transport_.coupling_.shape == (
+        np.sum(source), np.sum(~source)
+    )
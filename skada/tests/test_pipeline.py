@@ -4,14 +4,26 @@
 #
 # License: BSD 3-Clause
 
+from unittest import mock
+
 import numpy as np
 from numpy.testing import assert_array_equal
 
+from sklearn.base import clone
 from sklearn.decomposition import PCA
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.preprocessing import StandardScaler
 
-from skada import SubspaceAlignmentAdapter, PerDomain, Shared, make_da_pipeline
+from skada import (
+    CORALAdapter,
+    GaussianReweightDensityAdapter,
+    SubspaceAlignmentAdapter,
+    PerDomain,
+    Shared,
+    compile_da_pipeline,
+    make_da_pipeline,
+)
+from skada import _mapping, _reweight
 
 import pytest
 
@@ -139,3 +151,123 @@ def test_named_estimator():
 def test_empty_pipeline():
     with pytest.raises(TypeError):
         make_da_pipeline()
+
+
+@pytest.mark.parametrize(
+    'steps',
+    [
+        [CORALAdapter(), LogisticRegression()],
+        [
+            StandardScaler(),
+            PCA(),
+            SubspaceAlignmentAdapter(n_components=2),
+            LogisticRegression(),
+        ],
+        [
+            GaussianReweightDensityAdapter(),
+            LogisticRegression().set_fit_request(sample_weight=True),
+        ],
+        [PerDomain(StandardScaler()), CORALAdapter(), LogisticRegression()],
+        [StandardScaler(), LogisticRegression()],
+    ]
+)
+def test_compiled_pipeline(steps, da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    pipe = make_da_pipeline(*steps)
+    pipe.fit(X, y, sample_domain=sample_domain)
+    predictor = compile_da_pipeline(pipe)
+
+    X_target, _, target_domain = da_dataset.pack_test(as_targets=['t'])
+    for method in ['predict', 'predict_proba', 'decision_function']:
+        for batch in [slice(0, 1), slice(0, 10), slice(None)]:
+            assert_array_equal(
+                getattr(pipe, method)(
+                    X_target[batch], sample_domain=target_domain[batch]
+                ),
+                getattr(predictor, method)(
+                    X_target[batch], sample_domain=target_domain[batch]
+                ),
+            )
+    # automatically derives as a single target domain when sample_domain is `None`
+    if not isinstance(pipe.steps[0][1], PerDomain):
+        assert_array_equal(pipe.predict(X_target), predictor.predict(X_target))
+
+
+def test_compiled_pipeline_rejects_source(da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    pipe = make_da_pipeline(CORALAdapter(), LogisticRegression())
+    with pytest.raises(ValueError):
+        compile_da_pipeline(pipe)
+    pipe.fit(X, y, sample_domain=sample_domain)
+    predictor = compile_da_pipeline(pipe)
+    with pytest.raises(ValueError):
+        predictor.predict(X, sample_domain=sample_domain)
+
+
+def test_pipeline_partial_fit(da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    classes = np.unique(y[y >= 0])
+    pipe = make_da_pipeline(
+        StandardScaler(),
+        SGDClassifier(random_state=0).set_partial_fit_request(classes=True),
+    )
+    # batches mixing source and (masked) target samples
+    order = np.random.default_rng(0).permutation(X.shape[0])
+    for batch in np.array_split(order, 4):
+        pipe.partial_fit(
+            X[batch], y[batch], sample_domain=sample_domain[batch], classes=classes
+        )
+
+    # the scaler is fitted on all the samples, the classifier on labeled ones
+    scaler = pipe[0].get_estimator()
+    assert scaler.n_samples_seen_ == X.shape[0]
+    np.testing.assert_allclose(scaler.mean_, X.mean(axis=0))
+    assert pipe[1].get_estimator().t_ > 1
+    X_target, y_target, target_domain = da_dataset.pack_test(as_targets=['t'])
+    y_pred = pipe.predict(X_target, sample_domain=target_domain)
+    assert y_pred.shape == y_target.shape
+
+    # only available when all the steps support it
+    assert not hasattr(make_da_pipeline(PCA(), SGDClassifier()), 'partial_fit')
+
+
+@pytest.mark.parametrize(
+    'adapter, derive',
+    [
+        (CORALAdapter(), (_mapping, '_invsqrtm')),
+        (GaussianReweightDensityAdapter(), (_reweight, '_eigh')),
+    ],
+)
+def test_pipeline_partial_fit_adapter(adapter, derive, da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    # the source samples come first in the stream
+    assert np.all(np.diff(sample_domain < 0) >= 0)
+    classes = np.unique(y[y >= 0])
+    pipe = make_da_pipeline(
+        clone(adapter),
+        SGDClassifier(random_state=0).set_partial_fit_request(
+            classes=True, sample_weight=True
+        ),
+    )
+    batches = np.array_split(np.arange(X.shape[0]), 16)
+    module, name = derive
+    with mock.patch.object(
+        module, name, wraps=getattr(module, name)
+    ) as derive_parameters:
+        for batch in batches:
+            pipe.partial_fit(
+                X[batch], y[batch], sample_domain=sample_domain[batch], classes=classes
+            )
+    # the parameters are not derived again for each batch with target samples
+    n_target_batches = sum(np.any(sample_domain[batch] < 0) for batch in batches)
+    assert 0 < derive_parameters.call_count < n_target_batches
+
+    # the adapter is the same as the one fitted on all the samples
+    reference = clone(adapter).fit(X, y, sample_domain=sample_domain)
+    output = pipe[0].transform(X, sample_domain=sample_domain, allow_source=True)
+    expected = reference.transform(X, sample_domain=sample_domain, allow_source=True)
+    if isinstance(expected, dict):
+        output, expected = output['sample_weight'], expected['sample_weight']
+    np.testing.assert_allclose(output, expected, atol=1e-8)
+    X_target, y_target, target_domain = da_dataset.pack_test(as_targets=['t'])
+    assert pipe.predict(X_target, sample_domain=target_domain).shape == y_target.shape
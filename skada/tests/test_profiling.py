@@ -0,0 +1,70 @@
+# License: BSD 3-Clause
+
+import tracemalloc
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from skada import (
+    CORALAdapter,
+    PerDomain,
+    make_da_pipeline,
+    profile_da_pipeline,
+)
+from skada._profiling import _ACTIVE_TRACE
+
+import pytest
+
+
+def test_profile_da_pipeline(da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    X_target, y_target, target_domain = da_dataset.pack_test(as_targets=['t'])
+    pipe = make_da_pipeline(
+        PerDomain(StandardScaler()),
+        CORALAdapter(),
+        LogisticRegression(),
+    )
+    with profile_da_pipeline() as trace:
+        pipe.fit(X, y, sample_domain=sample_domain)
+        pipe.predict(X_target, sample_domain=target_domain)
+        pipe.score(X_target, y_target, sample_domain=target_domain)
+    assert _ACTIVE_TRACE.get() is None
+    assert not tracemalloc.is_tracing()
+
+    calls = [(e.selector, e.estimator, e.method, e.domain) for e in trace]
+    assert calls[:5] == [
+        ('PerDomain', 'StandardScaler', 'fit', None),
+        ('PerDomain', 'StandardScaler', 'fit', -2),
+        ('PerDomain', 'StandardScaler', 'fit', 1),
+        ('PerDomain', 'StandardScaler', 'transform', None),
+        ('PerDomain', 'StandardScaler', 'transform', -2),
+    ]
+    assert ('Shared', 'CORALAdapter', 'adapt', None) in calls
+    assert calls[-1] == ('Shared', 'LogisticRegression', 'score', None)
+
+    entries = trace.entries
+    assert entries[0].n_samples == X.shape[0]
+    assert entries[1].n_samples == np.sum(sample_domain == -2)
+    assert all(e.n_features == X.shape[1] for e in entries)
+    assert all(e.wall_time >= 0 and e.cpu_time >= 0 for e in entries)
+    # the peak of the selector includes the peaks of its domains
+    assert entries[0].peak_memory >= max(entries[1].peak_memory, 1)
+
+    table = trace.to_table().splitlines()
+    assert len(table) == len(trace) + 2
+    assert 'CORALAdapter' in table[-2]
+
+    # nothing is recorded outside of the context
+    pipe.fit(X, y, sample_domain=sample_domain)
+    assert len(trace) == len(calls)
+
+
+@pytest.mark.parametrize('trace_memory', [True, False])
+def test_profile_da_pipeline_trace_memory(trace_memory, da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    pipe = make_da_pipeline(StandardScaler(), LogisticRegression())
+    with profile_da_pipeline(trace_memory=trace_memory) as trace:
+        pipe.fit(X, y, sample_domain=sample_domain)
+    assert len(trace) == 3
+    assert all((e.peak_memory is not None) == trace_memory for e in trace)
@@ -5,6 +5,8 @@
 # License: BSD 3-Clause
 
 import numpy as np
+from sklearn import config_context
+from sklearn.base import clone
 from sklearn.linear_model import LogisticRegression
 
 from skada import (
@@ -18,6 +20,8 @@ from skada import (
     KLIEP,
     make_da_pipeline,
 )
+from skada.base import Shared, SourceSampleWeight
+from skada._utils import _call_scope
 
 import pytest
 
@@ -72,3 +76,89 @@ def test_reweight_warning(da_dataset):
     with pytest.warns(UserWarning,
                       match="Maximum iteration reached before convergence."):
         estimator.fit(X_train, y_train, sample_domain=sample_domain)
+
+
+@pytest.mark.parametrize(
+    "adapter",
+    [
+        ReweightDensityAdapter(),
+        GaussianReweightDensityAdapter(),
+        DiscriminatorReweightDensityAdapter(),
+        KLIEPAdapter(gamma=[0.1, 1], random_state=42),
+    ],
+)
+def test_reweight_preserves_float32(adapter, da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+
+    output = adapter.fit_transform(X, y, sample_domain=sample_domain)
+    output32 = adapter.fit_transform(
+        X.astype(np.float32), y, sample_domain=sample_domain
+    )
+    assert output32['X'].dtype == np.float32
+    assert output32['sample_weight'].dtype == np.float32
+    assert isinstance(output['sample_weight'], np.ndarray)
+    np.testing.assert_allclose(
+        output32['sample_weight'], output['sample_weight'], rtol=1e-3
+    )
+
+    # within a pipeline call, only the weights of source samples are stored
+    with _call_scope():
+        compact = adapter.fit_transform(X, y, sample_domain=sample_domain)
+    assert isinstance(compact['sample_weight'], SourceSampleWeight)
+    assert compact['sample_weight'].values.shape[0] == np.sum(sample_domain >= 0)
+    np.testing.assert_allclose(compact['sample_weight'], output['sample_weight'])
+
+    pipe = make_da_pipeline(clone(adapter))
+    pipe_output = pipe.fit_transform(X, y, sample_domain=sample_domain)
+    assert isinstance(pipe_output['sample_weight'], np.ndarray)
+    np.testing.assert_allclose(pipe_output['sample_weight'], output['sample_weight'])
+
+
+def test_kliep_working_memory(da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    adapter = KLIEPAdapter(gamma=1., random_state=42)
+    adapter.fit(X, y, sample_domain=sample_domain)
+    weights = adapter.adapt(X, sample_domain=sample_domain)['sample_weight']
+    # only a few rows of the kernel fit into the working memory
+    with config_context(working_memory=0.005):
+        chunked = adapter.adapt(X, sample_domain=sample_domain)['sample_weight']
+    np.testing.assert_allclose(weights, chunked)
+
+
+def test_gaussian_reweight_partial_fit(da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    adapter = GaussianReweightDensityAdapter().fit(X, y, sample_domain=sample_domain)
+    streamed = GaussianReweightDensityAdapter()
+    order = np.random.default_rng(0).permutation(X.shape[0])
+    for chunk in np.array_split(order, 4):
+        streamed.partial_fit(X[chunk], y[chunk], sample_domain=sample_domain[chunk])
+    # means and covariances are computed on adapt
+    assert not hasattr(streamed, 'cov_source_')
+    np.testing.assert_allclose(
+        streamed.adapt(X, sample_domain=sample_domain)['sample_weight'],
+        adapter.adapt(X, sample_domain=sample_domain)['sample_weight'],
+    )
+    for attr in ['mean_source_', 'cov_source_', 'mean_target_', 'cov_target_']:
+        np.testing.assert_allclose(
+            getattr(streamed, attr), getattr(adapter, attr), atol=1e-10
+        )
+
+
+@pytest.mark.parametrize(
+    "adapter",
+    [
+        ReweightDensityAdapter(),
+        GaussianReweightDensityAdapter(),
+        DiscriminatorReweightDensityAdapter(),
+        KLIEPAdapter(gamma=[0.1, 1], random_state=42),
+    ],
+)
+def test_reweight_chunked_transform(adapter, da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    selector = Shared(adapter)
+    selector.fit(X, y, sample_domain=sample_domain)
+    output = selector.transform(X, sample_domain=sample_domain, allow_source=True)
+    selector.set_params(chunk_size=50)
+    chunked = selector.transform(X, sample_domain=sample_domain, allow_source=True)
+    np.testing.assert_array_equal(chunked['X'], output['X'])
+    np.testing.assert_allclose(chunked['sample_weight'], output['sample_weight'])
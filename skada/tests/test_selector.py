@@ -3,24 +3,37 @@
 #
 # License: BSD 3-Clause
 
+from unittest import mock
+
 import numpy as np
 
+from sklearn.base import clone
 from sklearn.datasets import make_regression
-from sklearn.linear_model import LogisticRegression
+from sklearn.exceptions import UnsetMetadataPassedError
+from sklearn.linear_model import LogisticRegression, SGDRegressor
+from sklearn.preprocessing import StandardScaler
 from sklearn.utils.metadata_routing import get_routing_for_object
 
-from skada import SubspaceAlignmentAdapter, make_da_pipeline
+from skada import (
+    FitCache,
+    GaussianReweightDensityAdapter,
+    SubspaceAlignmentAdapter,
+    make_da_pipeline,
+)
 from skada.base import (
     AdaptationOutput,
     IncompatibleMetadataError,
     PerDomain,
     Shared,
+    SourceSampleWeight,
 )
 from skada.datasets import make_shifted_datasets
 from skada.utils import extract_source_indices
 from skada._utils import (
     _DEFAULT_MASKED_TARGET_CLASSIFICATION_LABEL,
     _DEFAULT_MASKED_TARGET_REGRESSION_LABEL,
+    _call_scope,
+    _find_labeled_samples,
 )
 
 import pytest
@@ -77,6 +90,14 @@ def test_base_selector_remove_masked():
     assert X_output.shape[0] == n_samples * 8, "X output shape mismatch"
     assert X_output.shape[0] == y_output.shape[0]
 
+    # compact weights are given only for the remaining (source) samples
+    source_weights = np.linspace(0, 1, n_samples * 8)
+    weights = SourceSampleWeight(
+        np.flatnonzero(source_idx), source_weights, n_samples=X.shape[0]
+    )
+    _, _, routed_params = selector._remove_masked(X, y, {'sample_weight': weights})
+    np.testing.assert_array_equal(routed_params['sample_weight'], source_weights)
+
 
 @pytest.mark.parametrize('step', [SubspaceAlignmentAdapter(), LogisticRegression()])
 def test_base_selector_remove_masked_transform(step):
@@ -125,6 +146,52 @@ def test_base_selector_remove_masked_continuous():
     assert X_output.shape[0] == y_output.shape[0]
 
 
+def test_base_selector_remove_masked_views():
+    X, y, sample_domain = make_shifted_datasets(
+        n_samples_source=10,
+        n_samples_target=10,
+        noise=0.1,
+        random_state=42,
+    )
+    source_idx = extract_source_indices(sample_domain)
+    y[~source_idx] = _DEFAULT_MASKED_TARGET_CLASSIFICATION_LABEL
+    selector = make_da_pipeline(LogisticRegression())[0]
+    weights = np.ones(X.shape[0])
+
+    # labeled source samples are packed first, no copies are made
+    X_output, y_output, routed_params = selector._remove_masked(
+        X, y, {'sample_weight': weights}
+    )
+    assert np.shares_memory(X_output, X)
+    assert np.shares_memory(routed_params['sample_weight'], weights)
+    np.testing.assert_array_equal(X_output, X[source_idx])
+    np.testing.assert_array_equal(y_output, y[source_idx])
+
+    # interleaved labels are selected by indices
+    order = np.random.default_rng(0).permutation(X.shape[0])
+    X_output, y_output, _ = selector._remove_masked(X[order], y[order], {})
+    assert not np.shares_memory(X_output, X)
+    np.testing.assert_array_equal(X_output, X[order][source_idx[order]])
+    np.testing.assert_array_equal(y_output, y[order][source_idx[order]])
+
+
+def test_per_domain_final_step_masked():
+    X, y, sample_domain = make_shifted_datasets(
+        n_samples_source=10,
+        n_samples_target=10,
+        noise=0.1,
+        random_state=42,
+    )
+    source_idx = extract_source_indices(sample_domain)
+    y[~source_idx] = _DEFAULT_MASKED_TARGET_CLASSIFICATION_LABEL
+    pipe = make_da_pipeline(PerDomain(LogisticRegression()))
+    pipe.fit(X, y, sample_domain=sample_domain)
+    # masked target samples are not used to fit domain estimators
+    assert list(pipe[0].estimators_) == [1]
+    y_pred = pipe.predict(X[source_idx], sample_domain=sample_domain[source_idx])
+    assert y_pred.shape == (source_idx.sum(),)
+
+
 @pytest.mark.parametrize("estimator_cls", [PerDomain, Shared])
 def test_selector_inherits_routing(estimator_cls):
     lr = LogisticRegression().set_fit_request(sample_weight=True)
@@ -133,6 +200,64 @@ def test_selector_inherits_routing(estimator_cls):
     assert routing.fit.requests['sample_weight']
 
 
+@pytest.mark.parametrize("estimator_cls", [PerDomain, Shared])
+def test_selector_routes_fitted_request(estimator_cls):
+    X, y, sample_domain = make_shifted_datasets(
+        n_samples_source=10,
+        n_samples_target=10,
+        noise=0.1,
+        random_state=42,
+    )
+    weights = np.ones(X.shape[0])
+    lr = LogisticRegression().set_score_request(sample_weight='weights')
+    estimator = estimator_cls(lr)
+    estimator.fit(X, y, sample_domain=sample_domain)
+
+    # aliased parameters are routed to the fitted estimator(s)
+    with mock.patch.object(
+        LogisticRegression,
+        'score',
+        autospec=True,
+        side_effect=lambda self, X, y, **params: np.zeros(X.shape[0]),
+    ) as score:
+        estimator.score(X, y, sample_domain=sample_domain, weights=weights)
+    assert score.called and all(
+        call.kwargs['sample_weight'] is not None for call in score.call_args_list
+    )
+
+    # unrequested parameters are still rejected
+    estimator = estimator_cls(LogisticRegression())
+    estimator.fit(X, y, sample_domain=sample_domain)
+    with pytest.raises(UnsetMetadataPassedError):
+        estimator.score(X, y, sample_domain=sample_domain, sample_weight=weights)
+
+
+@pytest.mark.parametrize("estimator_cls", [PerDomain, Shared])
+def test_selector_refit_after_request_change(estimator_cls):
+    X, y, sample_domain = make_shifted_datasets(
+        n_samples_source=10,
+        n_samples_target=10,
+        noise=0.1,
+        random_state=42,
+    )
+    weights = np.ones(X.shape[0])
+    estimator = estimator_cls(LogisticRegression())
+    estimator.fit(X, y, sample_domain=sample_domain)
+    with pytest.raises(UnsetMetadataPassedError):
+        estimator.fit(X, y, sample_domain=sample_domain, sample_weight=weights)
+
+    # the request of the base estimator is changed after fit
+    estimator.base_estimator.set_fit_request(sample_weight=True)
+    assert estimator.get_metadata_routing().fit.requests['sample_weight']
+    estimator.fit(X, y, sample_domain=sample_domain, sample_weight=weights)
+
+    # same within a pipeline
+    pipe = make_da_pipeline(LogisticRegression())
+    pipe.fit(X, y, sample_domain=sample_domain)
+    pipe[-1].base_estimator.set_fit_request(sample_weight=True)
+    pipe.fit(X, y, sample_domain=sample_domain, sample_weight=weights)
+
+
 def test_selector_rejects_incompatible_adaptation_output():
     X = AdaptationOutput(X=np.ones(10), sample_weight=np.zeros(10))
     y = np.zeros(10)
@@ -140,3 +265,130 @@ def test_selector_rejects_incompatible_adaptation_output():
 
     with pytest.raises(IncompatibleMetadataError):
         estimator.fit(X, y)
+
+
+@pytest.mark.parametrize("domain_n_jobs", [None, 2])
+def test_per_domain_selector_parallel(domain_n_jobs):
+    X, y, sample_domain = make_shifted_datasets(
+        n_samples_source=10,
+        n_samples_target=10,
+        shift='concept_drift',
+        noise=0.1,
+        random_state=42,
+    )
+    # make sure there are more than two domains to dispatch
+    sample_domain = sample_domain * (1 + np.arange(X.shape[0]) % 3)
+
+    serial = PerDomain(LogisticRegression())
+    serial.fit(X, y, sample_domain=sample_domain)
+    parallel = PerDomain(LogisticRegression(), domain_n_jobs=domain_n_jobs)
+    parallel.fit(X, y, sample_domain=sample_domain)
+
+    assert list(parallel.estimators_) == list(serial.estimators_)
+    np.testing.assert_array_equal(
+        serial.predict_proba(X, sample_domain=sample_domain),
+        parallel.predict_proba(X, sample_domain=sample_domain),
+    )
+
+
+def test_per_domain_selector_params():
+    selector = PerDomain(LogisticRegression(), domain_n_jobs=2, C=0.5)
+    params = selector.get_params()
+    assert params['domain_n_jobs'] == 2
+    assert params['C'] == 0.5
+
+    selector.set_params(domain_n_jobs=4, C=2.)
+    assert selector.domain_n_jobs == 4
+    assert selector.base_estimator.C == 2.
+
+    cloned = clone(selector)
+    assert cloned.domain_n_jobs == 4
+    assert cloned.base_estimator.C == 2.
+
+
+@pytest.mark.parametrize("estimator_cls", [PerDomain, Shared])
+def test_selector_chunk_size(estimator_cls):
+    X, y, sample_domain = make_shifted_datasets(
+        n_samples_source=10,
+        n_samples_target=10,
+        noise=0.1,
+        random_state=42,
+    )
+    estimator = estimator_cls(LogisticRegression())
+    estimator.fit(X, y, sample_domain=sample_domain)
+    chunked = clone(estimator).set_params(chunk_size=7)
+    assert chunked.get_params()['chunk_size'] == 7
+    chunked.fit(X, y, sample_domain=sample_domain)
+    for method in ['predict', 'predict_proba', 'decision_function']:
+        np.testing.assert_array_equal(
+            getattr(estimator, method)(X, sample_domain=sample_domain),
+            getattr(chunked, method)(X, sample_domain=sample_domain),
+        )
+
+
+def test_selector_chunk_size_adaptation_output():
+    X, y, sample_domain = make_shifted_datasets(
+        n_samples_source=10,
+        n_samples_target=10,
+        noise=0.1,
+        random_state=42,
+    )
+    # sources come first, so that some of the chunks have no source samples
+    adapter = Shared(GaussianReweightDensityAdapter())
+    adapter.fit(X, y, sample_domain=sample_domain)
+    output = adapter.transform(X, sample_domain=sample_domain, allow_source=True)
+    adapter.set_params(chunk_size=30)
+    with _call_scope():
+        chunked = adapter.transform(X, sample_domain=sample_domain, allow_source=True)
+    assert isinstance(chunked, AdaptationOutput)
+    assert isinstance(chunked['sample_weight'], SourceSampleWeight)
+    np.testing.assert_array_equal(output['X'], chunked['X'])
+    np.testing.assert_allclose(output['sample_weight'], chunked['sample_weight'])
+
+
+@pytest.mark.parametrize("method", ['fit', 'partial_fit'])
+def test_per_domain_finds_labeled_samples_once(method):
+    X, y, sample_domain = make_shifted_datasets(
+        n_samples_source=10,
+        n_samples_target=10,
+        noise=0.1,
+        random_state=42,
+    )
+    estimator = PerDomain(SGDRegressor(random_state=0))._mark_as_final()
+    with mock.patch(
+        'skada.base._find_labeled_samples', wraps=_find_labeled_samples
+    ) as find_labeled_samples:
+        getattr(estimator, method)(X, y, sample_domain=sample_domain)
+    assert find_labeled_samples.call_count == 1
+    assert set(estimator.estimators_) == set(np.unique(sample_domain[y != -1]))
+
+
+@pytest.mark.parametrize("estimator_cls", [PerDomain, Shared])
+def test_selector_partial_fit(estimator_cls):
+    X, y, sample_domain = make_shifted_datasets(
+        n_samples_source=10,
+        n_samples_target=10,
+        noise=0.1,
+        random_state=42,
+    )
+    estimator = estimator_cls(StandardScaler())
+    for batch in np.array_split(np.arange(X.shape[0]), 3):
+        estimator.partial_fit(X[batch], y[batch], sample_domain=sample_domain[batch])
+    fitted = clone(estimator).fit(X, y, sample_domain=sample_domain)
+    np.testing.assert_allclose(
+        estimator.transform(X, sample_domain=sample_domain),
+        fitted.transform(X, sample_domain=sample_domain),
+    )
+
+    # estimators taken from the fit cache are not updated in place
+    cache = FitCache()
+    estimator = estimator_cls(StandardScaler(), fit_cache=cache)
+    estimator.fit(X, y, sample_domain=sample_domain)
+    clone(estimator).fit(X, y, sample_domain=sample_domain)
+    estimator.partial_fit(X[:5], y[:5], sample_domain=sample_domain[:5])
+    cached = clone(estimator).fit(X, y, sample_domain=sample_domain)
+    assert cache.cache_info().hits == 2
+    np.testing.assert_allclose(
+        cached.transform(X, sample_domain=sample_domain),
+        fitted.transform(X, sample_domain=sample_domain),
+    )
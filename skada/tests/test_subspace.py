@@ -5,6 +5,7 @@
 # License: BSD 3-Clause
 
 import numpy as np
+from sklearn import config_context
 from sklearn.linear_model import LogisticRegression
 
 from skada import (
@@ -79,3 +80,34 @@ def test_subspace_default_n_components(adapter, n_samples, n_features, n_compone
     if isinstance(output, AdaptationOutput):
         output = output['X']
     assert output.shape[1] == n_components
+
+
+@pytest.mark.parametrize(
+    "adapter", [
+        SubspaceAlignmentAdapter(n_components=2, random_state=0),
+        TransferComponentAnalysisAdapter(n_components=2),
+    ]
+)
+def test_subspace_preserves_float32(adapter, da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+
+    X_adapt = adapter.fit_transform(X, y, sample_domain=sample_domain)
+    X32_adapt = adapter.fit_transform(
+        X.astype(np.float32), y, sample_domain=sample_domain
+    )
+    assert X32_adapt.dtype == np.float32
+    # eigenvectors are only defined up to the sign
+    signs = np.sign(np.sum(X32_adapt * X_adapt, axis=0))
+    np.testing.assert_allclose(X32_adapt * signs, X_adapt, rtol=1e-4, atol=1e-4)
+
+
+def test_tca_working_memory(da_dataset):
+    X, y, sample_domain = da_dataset.pack_train(as_sources=['s'], as_targets=['t'])
+    X_test, _, test_domain = da_dataset.pack_test(as_targets=['t'])
+    adapter = TransferComponentAnalysisAdapter(n_components=2)
+    adapter.fit(X, y, sample_domain=sample_domain)
+    X_adapt = adapter.transform(X_test, sample_domain=test_domain)
+    # only a few rows of the kernel fit into the working memory
+    with config_context(working_memory=0.01):
+        X_chunked = adapter.transform(X_test, sample_domain=test_domain)
+    np.testing.assert_allclose(X_adapt, X_chunked)
@@ -2,10 +2,16 @@
 #
 # License: BSD 3-Clause
 
+import tracemalloc
+from unittest import mock
+
 import pytest
 
 import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.utils import check_array
 
+from skada import CORALAdapter, make_da_pipeline
 from skada.datasets import (
     make_dataset_from_moons_distribution
 )
@@ -14,10 +20,17 @@ from skada.utils import (
     check_X_domain,
     extract_source_indices,
     source_target_split,
-    source_target_merge
-
+    source_target_merge,
+    DomainIndex,
+    get_domain_index,
+)
+from skada._utils import (
+    _call_scope,
+    _check_y_masking,
+    _find_labeled_samples,
+    _find_y_type,
+    _group_by_domain,
 )
-from skada._utils import _check_y_masking
 
 
 def test_check_y_masking_classification():
@@ -418,3 +431,191 @@ def test_source_target_merge():
             X_target,
             sample_domain=sample_domain
         )
+
+
+def test_group_by_domain():
+    sample_domain = np.array([2, -1, 2, 1, -1, 2])
+    labels, offsets, permutation = _group_by_domain(sample_domain)
+
+    np.testing.assert_array_equal(labels, np.array([-1, 1, 2]))
+    np.testing.assert_array_equal(offsets, np.array([0, 2, 3, 6]))
+    for label, start, end in zip(labels, offsets[:-1], offsets[1:]):
+        np.testing.assert_array_equal(
+            permutation[start:end],
+            np.flatnonzero(sample_domain == label)
+        )
+
+    labels, offsets, permutation = _group_by_domain(np.array([], dtype=np.int32))
+    assert labels.shape == (0,)
+    np.testing.assert_array_equal(offsets, np.array([0]))
+
+
+def test_domain_index():
+    sample_domain = np.array([2, -1, 2, 1, -3, 2])
+    domain_index = DomainIndex(sample_domain)
+
+    np.testing.assert_array_equal(domain_index.domains, np.array([-3, -1, 1, 2]))
+    np.testing.assert_array_equal(domain_index.counts, np.array([1, 1, 1, 3]))
+    np.testing.assert_array_equal(domain_index.source_mask, sample_domain >= 0)
+    assert domain_index.codes.dtype == np.uint8
+    assert domain_index.n_sources == 2
+    assert domain_index.n_targets == 2
+    assert domain_index.n_source_samples == 4
+    assert domain_index.n_target_samples == 2
+    np.testing.assert_array_equal(domain_index.get_indices(2), np.array([0, 2, 5]))
+    assert domain_index.get_indices(42).shape == (0,)
+    for domain_label, idx in domain_index.groups():
+        np.testing.assert_array_equal(
+            idx,
+            np.flatnonzero(sample_domain == domain_label)
+        )
+
+    # the source mask is shared, thus it has to be read-only
+    with pytest.raises(ValueError):
+        domain_index.source_mask[0] = False
+
+
+def test_get_domain_index_cache():
+    sample_domain = np.array([1, 1, -2, -2])
+    with _call_scope():
+        domain_index = get_domain_index(sample_domain)
+        assert get_domain_index(sample_domain) is domain_index
+        # the public mask is a writable copy of the shared one
+        source_idx = extract_source_indices(sample_domain)
+        assert source_idx is not domain_index.source_mask
+        np.testing.assert_array_equal(source_idx, domain_index.source_mask)
+        source_idx[0] = False
+        assert domain_index.source_mask[0]
+        # non-array inputs are supported
+        assert get_domain_index([1, -2]).n_targets == 1
+
+    # the index is built again outside of the call
+    sample_domain[0] = -2
+    updated_index = get_domain_index(sample_domain)
+    assert updated_index is not domain_index
+    assert updated_index.n_source_samples == 1
+    assert get_domain_index(sample_domain) is not updated_index
+
+
+def test_source_target_split_views():
+    X = np.arange(12.).reshape(6, 2)
+    y = np.arange(6)
+    sample_domain = np.array([1, 1, 2, -1, -1, -2])
+    assert get_domain_index(sample_domain).is_contiguous
+
+    X_source, X_target, y_source, y_target = source_target_split(
+        X, y, sample_domain=sample_domain, copy=False
+    )
+    assert np.shares_memory(X_source, X) and np.shares_memory(X_target, X)
+    np.testing.assert_array_equal(X_source, X[:3])
+    np.testing.assert_array_equal(y_target, y[3:])
+
+    # copies are returned by default
+    X_source, X_target = source_target_split(X, sample_domain=sample_domain)
+    assert not np.shares_memory(X_source, X)
+
+    # interleaved layout falls back to copies
+    sample_domain = np.array([1, -1, 1, -1, 2, -2])
+    assert not get_domain_index(sample_domain).is_contiguous
+    X_source, X_target = source_target_split(
+        X, sample_domain=sample_domain, copy=False
+    )
+    assert not np.shares_memory(X_source, X)
+    np.testing.assert_array_equal(X_source, X[sample_domain >= 0])
+
+
+@pytest.mark.parametrize('sample_domain', [
+    np.array([1, 1, 2, -1, -1, -2]),
+    np.array([-1, -1, 1, 1, 2, 2]),
+    np.array([1, -1, 1, -1, 2, -2]),
+])
+def test_source_target_split_merge_roundtrip(sample_domain):
+    X = np.arange(12.).reshape(6, 2)
+    X_source, X_target = source_target_split(
+        X, sample_domain=sample_domain, copy=False
+    )
+    X_merged, _ = source_target_merge(
+        X_source, X_target, sample_domain=sample_domain
+    )
+    np.testing.assert_array_equal(X_merged, X)
+
+
+def test_check_X_domain_validates_once():
+    X = np.random.RandomState(0).rand(10, 2)
+    sample_domain = np.array([1] * 5 + [-2] * 5)
+    with mock.patch('skada.utils.check_array', wraps=check_array) as checker:
+        with _call_scope():
+            X_checked, _ = check_X_domain(X, sample_domain)
+            check_X_domain(X_checked, sample_domain)
+            check_X_y_domain(X_checked, np.ones(10), sample_domain)
+    # X is checked once, the second call for X in 'check_X_y_domain'
+    # is skipped, only 'y' and 'sample_domain' are validated
+    validated = [call.args[0] for call in checker.call_args_list]
+    assert sum(v is X for v in validated) == 1
+    assert not any(v is X_checked for v in validated[1:])
+
+    # validation parameters are taken into account
+    X_nd = np.ones((4, 2, 2))
+    with pytest.raises(ValueError):
+        with _call_scope():
+            check_X_domain(check_X_y_domain(X_nd, np.ones(4), allow_nd=True)[0], None)
+
+    # outside of a pipeline call, arrays are always validated
+    X_checked[0, 0] = np.nan
+    with pytest.raises(ValueError, match='NaN'):
+        check_X_domain(X_checked, sample_domain)
+
+
+def test_pipeline_validates_inputs_on_each_call():
+    X, y, sample_domain = make_dataset_from_moons_distribution(
+        pos_source=0.1, pos_target=0.4, random_state=0, return_X_y=True
+    )
+    pipe = make_da_pipeline(CORALAdapter(), LogisticRegression())
+    pipe.fit(X, y, sample_domain=sample_domain)
+    X_target = X[sample_domain < 0]
+    pipe.predict(X_target, sample_domain=sample_domain[sample_domain < 0])
+
+    # the array validated by the previous call is modified in-place
+    X_target[0, 0] = np.nan
+    with pytest.raises(ValueError, match='NaN'):
+        pipe.predict(X_target, sample_domain=sample_domain[sample_domain < 0])
+
+
+def test_label_caches_are_scoped():
+    y = np.array([0, 1, -1, -1])
+    with _call_scope():
+        labeled = _find_labeled_samples(y)
+        assert _find_labeled_samples(y) is labeled
+        assert _find_y_type(y) == 'classification'
+
+    # labels are inferred again on the next call, in-place
+    # modifications between the calls are taken into account
+    y[2:] = [0, 1]
+    assert _find_labeled_samples(y) == slice(0, 4)
+
+
+def test_pipeline_validation_memory_does_not_grow_with_steps():
+    rng = np.random.RandomState(0)
+    X = rng.randn(4000, 50)
+    sample_domain = np.repeat([1, -2], 2000)
+    y = rng.randint(2, size=4000)
+    y[sample_domain < 0] = -1
+
+    def peak_memory(n_steps):
+        pipe = make_da_pipeline(
+            *[CORALAdapter() for _ in range(n_steps)],
+            LogisticRegression(max_iter=5),
+        )
+        tracemalloc.start()
+        try:
+            pipe.fit(X, y, sample_domain=sample_domain)
+            fit_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+            pipe.predict(X[2000:], sample_domain=sample_domain[2000:])
+            predict_peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return np.array([fit_peak, predict_peak])
+
+    # intermediate arrays are not held until the end of the call
+    assert np.all(peak_memory(8) < peak_memory(2) + X.nbytes)
@@ -2,6 +2,7 @@
 #
 # License: BSD 3-Clause
 
+from functools import cached_property
 from typing import Optional, Set, Sequence
 
 import warnings
@@ -12,7 +13,12 @@ from itertools import chain
 from sklearn.utils import check_array, check_consistent_length
 from sklearn.utils.multiclass import type_of_target
 
-from skada._utils import _check_y_masking
+from skada._utils import (
+    _check_y_masking,
+    _compact_index_dtype,
+    _group_by_domain,
+    _IdentityCache,
+)
 from skada._utils import (
     _DEFAULT_SOURCE_DOMAIN_LABEL,
     _DEFAULT_TARGET_DOMAIN_LABEL,
@@ -69,8 +75,13 @@ def check_X_y_domain(
         Array specifying the domain labels for each sample.
     """
 
-    X = check_array(X, input_name='X', allow_nd=allow_nd)
-    y = check_array(y, force_all_finite=True, ensure_2d=False, input_name='y')
+    X = _check_array_once(X, input_name='X', allow_nd=allow_nd)
+    y = _check_array_once(
+        y,
+        force_all_finite=True,
+        ensure_2d=False,
+        input_name='y'
+    )
     check_consistent_length(X, y)
 
     if sample_domain is None and not allow_auto_sample_domain:
@@ -88,12 +99,12 @@ def check_X_y_domain(
             mask = (np.isnan(y))
         sample_domain[mask] = _DEFAULT_TARGET_DOMAIN_LABEL
 
-    source_idx = extract_source_indices(sample_domain)
+    domain_index = get_domain_index(sample_domain)
 
     # xxx(okachaiev): this needs to be re-written to accommodate for a
     # a new domain labeling convention without "intersections"
-    n_sources = np.unique(sample_domain[source_idx]).shape[0]
-    n_targets = np.unique(sample_domain[~source_idx]).shape[0]
+    n_sources = domain_index.n_sources
+    n_targets = domain_index.n_targets
 
     if not allow_source and n_sources > 0:
         raise ValueError(f"Number of sources provided is {n_sources} "
@@ -154,7 +165,7 @@ def check_X_domain(
     sample_domain : array
         Combined domain labels for source and target domains.
     """
-    X = check_array(X, input_name='X')
+    X = _check_array_once(X, input_name='X', allow_nd=False)
 
     if sample_domain is None and not allow_auto_sample_domain:
         raise ValueError("Either 'sample_domain' or 'allow_auto_sample_domain' "
@@ -167,18 +178,18 @@ def check_X_domain(
             _DEFAULT_TARGET_DOMAIN_ONLY_LABEL * np.ones(X.shape[0], dtype=np.int32)
         )
 
-    source_idx = extract_source_indices(sample_domain)
+    domain_index = get_domain_index(sample_domain)
     check_consistent_length(X, sample_domain)
 
     if allow_domains is not None:
-        for domain in np.unique(sample_domain):
+        for domain in domain_index.domains:
             # xxx(okachaiev): re-definition of the wildcards
             wildcard = np.inf if domain >= 0 else -np.inf
             if domain not in allow_domains and wildcard not in allow_domains:
                 raise ValueError(f"Unknown domain label '{domain}' given")
 
-    n_sources = np.unique(sample_domain[source_idx]).shape[0]
-    n_targets = np.unique(sample_domain[~source_idx]).shape[0]
+    n_sources = domain_index.n_sources
+    n_targets = domain_index.n_targets
 
     if not allow_source and n_sources > 0:
         raise ValueError(f"Number of sources provided is {n_sources} "
@@ -196,6 +207,31 @@ def check_X_domain(
     return X, sample_domain
 
 
+# arrays that were already returned by `check_array` from one of the `check_*`
+# functions within the current call of a DA pipeline, along with the validation
+# parameters used. Pipeline steps pass the same array objects around, so
+# downstream steps can skip re-validation. Outside of a pipeline call (see
+# `_call_scope`) arrays are always validated.
+_VALIDATED_INPUTS = _IdentityCache()
+
+
+def _is_validated(array, check_params) -> bool:
+    return _VALIDATED_INPUTS.get(array) == check_params
+
+
+def _check_array_once(array, **check_params):
+    """Same as :func:`~sklearn.utils.check_array`, but marks the output as
+    validated so that the array is not checked again with the same parameters
+    within the same pipeline call.
+    """
+    check_params = frozenset(check_params.items())
+    if _is_validated(array, check_params):
+        return array
+    array = check_array(array, **dict(check_params))
+    _VALIDATED_INPUTS.set(array, check_params)
+    return array
+
+
 def extract_source_indices(sample_domain):
     """Extract the indices of the source samples.
 
@@ -209,20 +245,163 @@ def extract_source_indices(sample_domain):
     source_idx : array
         Boolean array indicating source indices.
     """
-    sample_domain = check_array(
-        sample_domain,
-        dtype=np.int32,
-        ensure_2d=False,
-        input_name='sample_domain'
-    )
+    # the mask of the index is shared, thus read-only
+    return get_domain_index(sample_domain).source_mask.copy()
+
+
+class DomainIndex:
+    """Domain bookkeeping derived from a `sample_domain` array.
+
+    The index is meant to be computed once per `sample_domain` array within
+    a pipeline call (see :func:`get_domain_index`) and shared by input validation,
+    source/target split and merge, and the selectors, so that domain
+    labels are not re-validated and re-scanned on each call. It is only
+    shared within pipeline calls: otherwise, each of these functions builds
+    the index again.
+
+    Parameters
+    ----------
+    sample_domain : array-like of shape (n_samples,)
+        Array specifying the domain labels for each sample.
 
-    source_idx = (sample_domain >= 0)
-    return source_idx
+    Attributes
+    ----------
+    n_samples : int
+        Number of samples.
+    domains : array of shape (n_domains,)
+        Sorted unique domain labels.
+    counts : array of shape (n_domains,)
+        Number of samples for each domain label.
+    codes : array of shape (n_samples,)
+        Position of each sample's label in `domains`, stored using the
+        smallest unsigned integer dtype able to represent it.
+    source_mask : array of shape (n_samples,)
+        Read-only boolean array indicating source samples.
+    n_sources : int
+        Number of source domains.
+    n_targets : int
+        Number of target domains.
+    n_source_samples : int
+        Number of source samples.
+    n_target_samples : int
+        Number of target samples.
+    source_slice : slice or None
+        When all source samples form a single contiguous block of rows (as
+        produced by :meth:`~skada.datasets.DomainAwareDataset.pack`), the
+        slice selecting them, None otherwise.
+    target_slice : slice or None
+        The slice selecting target samples for the contiguous layout,
+        None otherwise.
+    """
+
+    def __init__(self, sample_domain):
+        sample_domain = check_array(
+            sample_domain,
+            dtype=np.int32,
+            ensure_2d=False,
+            input_name='sample_domain'
+        )
+        domains, codes, counts = np.unique(
+            sample_domain,
+            return_inverse=True,
+            return_counts=True
+        )
+        self.n_samples = sample_domain.shape[0]
+        self.domains = domains
+        self.counts = counts
+        self.codes = codes.reshape(-1).astype(_compact_index_dtype(domains.shape[0]))
+        source_mask = (sample_domain >= 0)
+        source_mask.setflags(write=False)
+        self.source_mask = source_mask
+        is_source = (domains >= 0)
+        self.n_sources = int(np.count_nonzero(is_source))
+        self.n_targets = domains.shape[0] - self.n_sources
+        self.n_source_samples = int(counts[is_source].sum())
+        self.n_target_samples = self.n_samples - self.n_source_samples
+
+        # detect the layout where sources and targets are not interleaved,
+        # so that they could be accessed with slices instead of masks
+        self.source_slice, self.target_slice = None, None
+        n_source, n_target = self.n_source_samples, self.n_target_samples
+        if source_mask[:n_source].all():
+            self.source_slice = slice(0, n_source)
+            self.target_slice = slice(n_source, self.n_samples)
+        elif source_mask[n_target:].all():
+            self.source_slice = slice(n_target, self.n_samples)
+            self.target_slice = slice(0, n_target)
+
+    @property
+    def is_contiguous(self) -> bool:
+        """Whether source and target samples form two contiguous blocks."""
+        return self.source_slice is not None
+
+    @cached_property
+    def _grouping(self):
+        # the codes are small unsigned integers, which makes the stable
+        # sort used for grouping a linear-time radix sort in most cases
+        _, offsets, permutation = _group_by_domain(self.codes)
+        return offsets, permutation
+
+    @property
+    def offsets(self):
+        """Offsets of each domain group within `permutation`."""
+        return self._grouping[0]
+
+    @property
+    def permutation(self):
+        """Indices of the samples sorted by domain label."""
+        return self._grouping[1]
+
+    def get_indices(self, domain_label):
+        """Indices of the samples from the given domain."""
+        position = np.searchsorted(self.domains, domain_label)
+        if position == self.domains.shape[0] or (
+            self.domains[position] != domain_label
+        ):
+            return np.array([], dtype=self.permutation.dtype)
+        return self.permutation[self.offsets[position]:self.offsets[position+1]]
+
+    def groups(self):
+        """Iterate over (domain label, sample indices) pairs."""
+        offsets, permutation = self.offsets, self.permutation
+        for position, domain_label in enumerate(self.domains):
+            yield domain_label, permutation[offsets[position]:offsets[position+1]]
+
+
+# domain indices shared by the steps of a pipeline call
+_DOMAIN_INDEX_CACHE = _IdentityCache()
+
+
+def get_domain_index(sample_domain) -> DomainIndex:
+    """Get the :class:`DomainIndex` associated with the `sample_domain` array.
+
+    Within a pipeline call, the index is cached per array object: subsequent
+    calls with the same array return the same index. Otherwise, the index
+    is built on each call.
+
+    Parameters:
+    ----------
+    sample_domain : array-like of shape (n_samples,)
+        Array specifying the domain labels for each sample.
+
+    Returns:
+    ----------
+    domain_index : DomainIndex
+        Domain bookkeeping for the given labels.
+    """
+    domain_index = _DOMAIN_INDEX_CACHE.get(sample_domain)
+    if domain_index is None:
+        domain_index = _DOMAIN_INDEX_CACHE.set(
+            sample_domain,
+            DomainIndex(sample_domain)
+        )
+    return domain_index
 
 
 def source_target_split(
     *arrays,
-    sample_domain
+    sample_domain,
+    copy: bool = True
 ):
     r""" Split data into source and target domains
 
@@ -235,6 +414,11 @@ def source_target_split(
         sample_weight.
     sample_domain : array-like of shape (n_samples,)
         Array specifying the domain labels for each sample.
+    copy : bool, default=True
+        If False and source samples are stored contiguously (e.g. as produced
+        by :meth:`~skada.datasets.DomainAwareDataset.pack`), the splits are
+        returned as views of the input arrays rather than copies. In such a
+        case modifying the splits in-place modifies the inputs as well.
 
     Returns
     -------
@@ -247,10 +431,15 @@ def source_target_split(
 
     check_consistent_length(arrays)
 
-    source_idx = extract_source_indices(sample_domain)
+    domain_index = get_domain_index(sample_domain)
+    if not copy and domain_index.is_contiguous:
+        source_idx, target_idx = domain_index.source_slice, domain_index.target_slice
+    else:
+        source_idx = domain_index.source_mask
+        target_idx = ~source_idx
 
     return list(chain.from_iterable(
-        (a[source_idx], a[~source_idx]) if a is not None else (None, None)
+        (a[source_idx], a[target_idx]) if a is not None else (None, None)
         for a in arrays
     ))
 
@@ -369,9 +558,9 @@ def source_target_merge(
 
     # To test afterward if the number of samples in source-target arrays
     # and the number infered in the sample_domain are consistent
-    source_indices = extract_source_indices(sample_domain)
-    source_samples = np.count_nonzero(source_indices)
-    target_samples = np.count_nonzero(~source_indices)
+    domain_index = get_domain_index(sample_domain)
+    source_samples = domain_index.n_source_samples
+    target_samples = domain_index.n_target_samples
 
     # ################ Merge arrays #################
     merges = []  # List of merged arrays
@@ -386,6 +575,13 @@ def source_target_merge(
         if np.size(arrays[i+1]) == 0:
             index_is_empty = i+1
 
+        # nothing to infer when the domain has no samples, e.g. when
+        # adapting a batch of target samples
+        if index_is_empty == i and source_samples == 0:
+            index_is_empty = None
+        elif index_is_empty == i+1 and target_samples == 0:
+            index_is_empty = None
+
         if index_is_empty is not None:
             # We need to infer the value of the empty array in the pair
             warnings.warn(
@@ -449,23 +645,29 @@ def _merge_arrays(
         (n_samples_source + n_samples_target, n_features)
     """
 
+    domain_index = get_domain_index(sample_domain)
     if array_source.shape[0] > 0 and array_target.shape[0] > 0:
-        output = np.zeros_like(
-            np.concatenate((array_source, array_target)), dtype=array_source.dtype
+        output = np.empty(
+            (domain_index.n_samples, *array_source.shape[1:]),
+            dtype=array_source.dtype
         )
-        output[sample_domain >= 0] = array_source
-        output[sample_domain < 0] = array_target
+        if domain_index.is_contiguous:
+            output[domain_index.source_slice] = array_source
+            output[domain_index.target_slice] = array_target
+        else:
+            output[domain_index.source_mask] = array_source
+            output[~domain_index.source_mask] = array_target
 
     elif array_source.shape[0] > 0:
         output = np.zeros_like(
             array_source, dtype=array_source.dtype
         )
-        output[sample_domain >= 0] = array_source
+        output[domain_index.source_mask] = array_source
 
     else:
         output = np.zeros_like(
             array_target, dtype=array_target.dtype
         )
-        output[sample_domain < 0] = array_target
+        output[~domain_index.source_mask] = array_target
 
     return output